@@ -2,6 +2,7 @@ import requests
 import time
 import os
 from textPlayer import TextPlayer
+from llm_client import get_client, GUI_DEFAULT_MODEL, MODEL_CHOICES
 import random
 from colorama import init, Fore, Style
 import tkinter as tk
@@ -204,7 +205,7 @@ class SettingsWindow:
         model_label.pack(side=tk.LEFT, padx=(0, 10))
         
         self.model_var = tk.StringVar(value=app.ai_model)
-        models = ['llama3', 'mistral', 'codellama']
+        models = MODEL_CHOICES
         model_combo = tk.Combobox(
             model_frame,
             textvariable=self.model_var,
@@ -285,7 +286,7 @@ class ZorkGUI:
         self.current_wait_time = 1.0
         self.max_history_size = 10
         self.font_size = 14
-        self.ai_model = 'llama3'
+        self.ai_model = GUI_DEFAULT_MODEL
         self.ai_temperature = 0.7
         
         # Set up colors
@@ -574,7 +575,7 @@ class ZorkGUI:
                 # Wait at least 0.5 seconds between actions
                 if current_time - last_action_time >= 0.5:
                     # Get AI's next action, only using the last 5 actions for context
-                    thinking, action = chat_with_ollama(start_output, "\n".join(game_history[-5:]))
+                    thinking, action = chat_with_ollama(start_output, "\n".join(game_history[-5:]), self.ai_model)
                     
                     if thinking and action:
                         # Send the action to the game
@@ -618,12 +619,10 @@ class ZorkGUI:
                 except:
                     pass
 
-def chat_with_ollama(game_output, game_history):
+def chat_with_ollama(game_output, game_history, model=GUI_DEFAULT_MODEL):
     """
     Send game output to Ollama and get the next action.
     """
-    url = "http://localhost:11434/api/chat"
-    
     # Create a context-aware prompt
     prompt = f"""You are playing Zork, a text adventure game. Here is the current game output:
 
@@ -656,7 +655,7 @@ THINKING: I see a sword on the ground. Taking it would be useful for combat late
 ACTION: take sword"""
 
     data = {
-        "model": "llama3",
+        "model": model,
         "messages": [
             {
                 "role": "user",
@@ -667,9 +666,7 @@ ACTION: take sword"""
     }
     
     try:
-        response = requests.post(url, json=data)
-        response.raise_for_status()
-        content = response.json()["message"]["content"].strip()
+        content = get_client().chat(data)["message"]["content"].strip()
         
         # Parse thinking and action
         thinking = ""
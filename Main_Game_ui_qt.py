@@ -5,6 +5,7 @@ import requests
 import threading
 from queue import Queue
 import subprocess
+from llm_client import get_client, GUI_DEFAULT_MODEL, MODEL_CHOICES
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QPushButton, QLabel, QComboBox, 
                            QTextEdit, QDialog, QScrollArea, QFrame, 
@@ -74,7 +75,7 @@ class SettingsDialog(QDialog):
         model_layout = QHBoxLayout()
         model_label = QLabel("AI Model:")
         self.model_combo = QComboBox()
-        self.model_combo.addItems(['llama3', 'mistral', 'codellama'])
+        self.model_combo.addItems(MODEL_CHOICES)
         model_layout.addWidget(model_label)
         model_layout.addWidget(self.model_combo)
         ai_layout.addLayout(model_layout)
@@ -115,7 +116,7 @@ class MainWindow(QMainWindow):
         self.current_wait_time = 1.0
         self.max_history_size = 10
         self.font_size = 14
-        self.ai_model = 'llama3'
+        self.ai_model = GUI_DEFAULT_MODEL
         self.ai_temperature = 0.7
         
         # Set up colors
@@ -320,10 +321,8 @@ class MainWindow(QMainWindow):
             
         # Check if Ollama is running and start it if needed
         try:
-            response = requests.get("http://localhost:11434/api/version")
-            if response.status_code != 200:
-                self.start_ollama_server()
-        except requests.exceptions.ConnectionError:
+            get_client().version()
+        except requests.exceptions.RequestException:
             self.start_ollama_server()
             
         self.is_running = True
@@ -459,7 +458,7 @@ class MainWindow(QMainWindow):
                 # Wait at least 0.5 seconds between actions
                 if current_time - last_action_time >= 0.5:
                     # Get AI's next action, only using the last 5 actions for context
-                    thinking, action = chat_with_ollama(start_output, "\n".join(game_history[-5:]))
+                    thinking, action = chat_with_ollama(start_output, "\n".join(game_history[-5:]), self.ai_model)
                     
                     if thinking and action:
                         # Send the action to the game
@@ -503,12 +502,10 @@ class MainWindow(QMainWindow):
                 except:
                     pass
 
-def chat_with_ollama(game_output, game_history):
+def chat_with_ollama(game_output, game_history, model=GUI_DEFAULT_MODEL):
     """
     Send game output to Ollama and get the next action.
     """
-    url = "http://localhost:11434/api/chat"
-    
     # Create a context-aware prompt
     prompt = f"""You are playing Zork, a text adventure game. Here is the current game output:
 
@@ -541,7 +538,7 @@ THINKING: I see a sword on the ground. Taking it would be useful for combat late
 ACTION: take sword"""
 
     data = {
-        "model": "llama3",
+        "model": model,
         "messages": [
             {
                 "role": "user",
@@ -552,9 +549,7 @@ ACTION: take sword"""
     }
     
     try:
-        response = requests.post(url, json=data)
-        response.raise_for_status()
-        content = response.json()["message"]["content"].strip()
+        content = get_client().chat(data)["message"]["content"].strip()
         
         # Parse thinking and action
         thinking = ""
@@ -0,0 +1,144 @@
+import json
+from threading import Thread, Event, Lock
+
+'''
+ Incremental parsing of the JSON object an LLM streams back under a "format" schema, so each
+ field can be used the moment its closing quote arrives rather than when the reply is finished.
+
+ Class Summary: JSONFieldParser([on_field], [on_text])
+ Feeds on text chunks of a flat JSON object. on_field(name, value) is called when a value is
+ complete; on_text(name, chunk) is called with every piece of a string value as it arrives.
+
+ Class Summary: StreamedReply([iterator of text chunks], [on_text])
+ Consumes a streamed reply on a background thread.
+ Methods:    wait_for([field name]), blocks until that field is complete, returns it (None if it never came)
+            result(), blocks until the stream ends, returns every field received
+            error, the exception that ended the stream early, if any
+'''
+
+ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class JSONFieldParser:
+    def __init__(self, on_field=None, on_text=None):
+        self.on_field = on_field
+        self.on_text = on_text
+        self.fields = {}
+        self.state = 'start'
+        self.key = ''
+        self.value = []
+        self.escape = None
+        self.depth = 0
+
+    def feed(self, chunk):
+        text = []
+        for char in chunk:
+            if self.state == 'string' or self.state == 'key':
+                if self.escape != None:
+                    self.escape += char
+                    if self.escape[0] == 'u':
+                        if len(self.escape) < 5:
+                            continue
+                        decoded = chr(int(self.escape[1:], 16))
+                    else:
+                        decoded = ESCAPES.get(self.escape, self.escape)
+                    self.escape = None
+                    self.add_char(decoded, text)
+                elif char == '\\':
+                    self.escape = ''
+                elif char == '"':
+                    self.flush_text(text)
+                    self.end_string()
+                else:
+                    self.add_char(char, text)
+            elif self.state == 'other':
+                # Numbers, literals and nested values, kept as raw JSON until they end
+                if char in '[{':
+                    self.depth += 1
+                elif char in ']}' and self.depth > 0:
+                    self.depth -= 1
+                elif self.depth == 0 and char in ',}':
+                    self.finish_field(json.loads(''.join(self.value)))
+                    self.state = 'done' if char == '}' else 'expect_key'
+                    continue
+                self.value.append(char)
+            elif char == '"':
+                if self.state == 'start' or self.state == 'expect_key':
+                    self.state = 'key'
+                    self.key = ''
+                elif self.state == 'expect_value':
+                    self.state = 'string'
+                    self.value = []
+            elif self.state == 'expect_value' and not char.isspace() and char != ':':
+                self.state = 'other'
+                self.value = [char]
+                self.depth = 1 if char in '[{' else 0
+        self.flush_text(text)
+
+    def add_char(self, char, text):
+        if self.state == 'key':
+            self.key += char
+        else:
+            self.value.append(char)
+            text.append(char)
+
+    def flush_text(self, text):
+        if text and self.on_text != None:
+            self.on_text(self.key, ''.join(text))
+        text.clear()
+
+    def end_string(self):
+        if self.state == 'key':
+            self.state = 'expect_value'
+        else:
+            self.finish_field(''.join(self.value))
+            self.state = 'expect_key'
+
+    def finish_field(self, value):
+        self.fields[self.key] = value
+        self.value = []
+        if self.on_field != None:
+            self.on_field(self.key, value)
+
+class StreamedReply:
+    def __init__(self, chunks, on_text=None):
+        self.parser = JSONFieldParser(self.field_done, on_text)
+        self.events = {}
+        self.lock = Lock()
+        self.finished = Event()
+        self.error = None
+        self.thread = Thread(target=self.consume, args=(chunks,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def event(self, name):
+        with self.lock:
+            if name not in self.events:
+                self.events[name] = Event()
+            return self.events[name]
+
+    def field_done(self, name, value):
+        self.event(name).set()
+
+    def consume(self, chunks):
+        try:
+            for chunk in chunks:
+                self.parser.feed(chunk)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished.set()
+            # Release anyone still waiting on a field that will never arrive
+            with self.lock:
+                for event in self.events.values():
+                    event.set()
+
+    def wait_for(self, name, timeout=None):
+        event = self.event(name)
+        if self.finished.is_set():
+            event.set()
+        event.wait(timeout)
+        return self.parser.fields.get(name)
+
+    def result(self, timeout=None):
+        self.finished.wait(timeout)
+        return dict(self.parser.fields)
@@ -0,0 +1,109 @@
+import re
+from functools import lru_cache
+from story_index import load_index
+from zmachine import dictionary_form
+
+'''
+ Class Summary: ActionValidator([name of the game file])
+ Checks actions against the game's own dictionary, read from the story index once per game, so a
+ command the parser can't understand is caught before it costs an interpreter round trip.
+ The Z-machine only compares the first 6 Z-characters of a word (9 from version 4 on), and
+ hyphens, digits and capitals take two each, so words are looked up cut down the same way
+ (zmachine.dictionary_form). Words the validator can't judge (non-ASCII letters) are let through.
+
+ Methods:    tokenize([action]), returns the words the game's parser will see
+             unknown_words([action]), returns the words missing from the dictionary
+             is_valid([action]), True when every word is known (the grammar is not checked)
+             normalize([action]), returns the action cleaned up into known words, or None
+             ranked_actions([objects], [exits], [limit]), returns template actions the game
+               understands, filled in with objects and exits, most useful first
+
+ load_vocabulary([game file]) returns (word separators, frozenset of words, resolution, alphabets),
+ cached per game.
+'''
+
+FILLER_WORDS = frozenset(['carefully', 'slowly', 'quickly', 'please', 'try', 'to', 'again', 'around', 'closely', 'more'])
+TRAILING_PUNCTUATION = '.!?;'
+
+# (template, priority): {exit} takes an unexplored exit, {object} a visible object
+ACTION_TEMPLATES = (
+    ('{exit}', 10),
+    ('take {object}', 8),
+    ('examine {object}', 7),
+    ('open {object}', 6),
+    ('read {object}', 5),
+    ('look', 4),
+    ('inventory', 3),
+    ('take all', 2),
+    ('search {object}', 2),
+    ('push {object}', 1),
+)
+
+@lru_cache(maxsize=None)
+def load_vocabulary(game_filename):
+    index = load_index(game_filename)
+    return index.separators, index.words(), index.resolution, tuple(index.alphabets)
+
+class ActionValidator:
+    def __init__(self, game_filename):
+        self.game_filename = game_filename
+        self.separators, self.words, self.resolution, self.alphabets = load_vocabulary(game_filename)
+        self.separator_pattern = re.compile('([' + re.escape(self.separators) + '])') if self.separators else None
+
+    def tokenize(self, action):
+        action = action.lower()
+        if self.separator_pattern != None:
+            action = self.separator_pattern.sub(r' \1 ', action)
+        return action.split()
+
+    def is_known(self, word):
+        if word.isdigit() or not word.isascii():
+            return True
+        return dictionary_form(word, self.resolution, self.alphabets) in self.words
+
+    def unknown_words(self, action):
+        return [word for word in self.tokenize(action) if not self.is_known(word)]
+
+    def is_valid(self, action):
+        return bool(action.strip()) and not self.unknown_words(action)
+
+    def normalize(self, action):
+        action = ' '.join(action.lower().split()).rstrip(TRAILING_PUNCTUATION)
+        if self.is_valid(action):
+            return action
+        # Models pad commands with adverbs ("carefully open the mailbox"); drop those if that is all
+        words = [word for word in action.split() if not (word in FILLER_WORDS and not self.is_known(word))]
+        action = ' '.join(words)
+        if words and self.is_valid(action):
+            return action
+        return None
+
+    # Last word of an object phrase ("small mailbox" -> "mailbox") if the game knows it
+    def object_noun(self, phrase):
+        words = self.tokenize(phrase)
+        for word in reversed(words):
+            if self.is_known(word):
+                return word
+        return None
+
+    def ranked_actions(self, objects=(), exits=(), limit=10):
+        nouns = []
+        for phrase in objects:
+            noun = self.object_noun(phrase)
+            if noun != None and noun not in nouns:
+                nouns.append(noun)
+        candidates = []
+        seen = set()
+        for template, priority in ACTION_TEMPLATES:
+            if '{exit}' in template:
+                fills = [template.format(exit=direction) for direction in exits]
+            elif '{object}' in template:
+                fills = [template.format(object=noun) for noun in nouns]
+            else:
+                fills = [template]
+            for action in fills:
+                if action not in seen and self.is_valid(action):
+                    seen.add(action)
+                    candidates.append((priority, action))
+        candidates.sort(key=lambda candidate: -candidate[0])
+        return [action for _, action in candidates[:limit]]
@@ -0,0 +1,76 @@
+import os
+import time
+import asyncio
+from asyncio.subprocess import PIPE
+from process_manager import DEFAULT_PROMPT_TIMEOUT
+from pipe_reader import PROMPT_PATTERN_BYTES, READ_SIZE
+
+'''
+ Class Summary: AsyncProcessManager([name of the game file])
+ Coroutine counterpart of ProcessManager. The dfrotz pipes are serviced by the running event
+ loop, so no reader thread is needed and a single loop can drive thousands of games. Output is
+ always read up to the game's prompt (or prompt_timeout), as with ProcessManager(wait_for_prompt=True).
+'''
+
+class AsyncProcessManager:
+    def __init__(self, game_filename, prompt_timeout=DEFAULT_PROMPT_TIMEOUT):
+        self.game_loaded_properly = True
+        self.prompt_timeout = prompt_timeout
+        self.game_process = None
+
+        # Verify that specified game file exists, else limit functionality
+        if game_filename == None or not os.path.exists('games/' + game_filename):
+            self.game_loaded_properly = False
+            print("Unrecognized game file or bad path")
+            return
+
+        self.game_filename = game_filename
+
+    async def start_game(self):
+        if self.game_loaded_properly == True:
+            self.game_process = await asyncio.create_subprocess_exec(
+                './frotz/dfrotz', 'games/' + self.game_filename, stdin=PIPE, stdout=PIPE)
+            return True
+        return False
+
+    async def send_command(self, command):
+        if self.game_loaded_properly == True:
+            self.game_process.stdin.write((command + '\n').encode())
+            await self.game_process.stdin.drain()
+            return True
+        return False
+
+    async def get_raw_output(self, timeout=None):
+        if timeout == None:
+            timeout = self.prompt_timeout
+        deadline = time.monotonic() + timeout
+        command_output = bytearray()
+
+        # Read until the game prints its prompt, the deadline passes or the game exits
+        while not PROMPT_PATTERN_BYTES.search(command_output):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(self.game_process.stdout.read(READ_SIZE), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            command_output += chunk
+
+        return command_output.decode('utf-8', errors='ignore')
+
+    async def quit(self):
+        if self.game_loaded_properly == True and self.game_process != None:
+            try:
+                self.game_process.stdin.write(b'quit\ny\n')
+                await self.game_process.stdin.drain()
+                self.game_process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            try:
+                await asyncio.wait_for(self.game_process.wait(), self.prompt_timeout)
+            except asyncio.TimeoutError:
+                self.game_process.kill()
+                await self.game_process.wait()
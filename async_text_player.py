@@ -0,0 +1,72 @@
+from async_process_manager import AsyncProcessManager
+from process_manager import DEFAULT_PROMPT_TIMEOUT
+from text_manager import needs_keypress, parse_score, parse_turn, normalize_output
+
+'''
+ Class Summary: AsyncTextPlayer([name of the game file])
+ Mirrors TextPlayer with coroutines, so one asyncio event loop can run many games at once and
+ overlap them with requests to the LLM. Output is parsed exactly as TextManager does it.
+
+ Methods:	await run()
+			await execute_command([command string])
+			await execute_turn([command string]), returns a TurnResult
+			await get_score(), returns None if no score found, returns (2, 100) if 2/100 found
+			await quit()
+
+ Example:
+	async def play(game):
+		player = AsyncTextPlayer(game)
+		await player.run()
+		output = await player.execute_command('look')
+		await player.quit()
+
+	await asyncio.gather(*(play('zork1.z5') for _ in range(100)))
+'''
+
+class AsyncTextPlayer:
+
+	# Initializes the class, sets variables
+	def __init__(self, game_filename, prompt_timeout=DEFAULT_PROMPT_TIMEOUT):
+		self.process_manager = AsyncProcessManager(game_filename, prompt_timeout)
+		self.game_loaded_properly = self.process_manager.game_loaded_properly
+		self.game_filename = game_filename
+
+	# Runs the game
+	async def run(self):
+		if self.game_loaded_properly == True:
+			if await self.process_manager.start_game():
+				# Grab start info from game
+				start_output = await self.get_command_output()
+				if needs_keypress(start_output):
+					# One line per key: send_command adds the newline, and every extra line would get its own
+					# response and prompt, leaving later reads a turn behind
+					start_output += await self.execute_command(' ')
+				if 'introduction' in start_output:
+					start_output += await self.execute_command('no')  # Parc
+				return start_output
+		return None
+
+	# Send a command to the game and return the output
+	async def execute_command(self, command):
+		if self.game_loaded_properly == True:
+			return (await self.execute_turn(command)).text
+
+	# Like execute_command, but returns the whole text_manager.TurnResult
+	async def execute_turn(self, command):
+		if self.game_loaded_properly == True:
+			await self.process_manager.send_command(command)
+			return parse_turn(await self.process_manager.get_raw_output())
+
+	# Returns the current score in a game
+	async def get_score(self):
+		if self.game_loaded_properly == True:
+			await self.process_manager.send_command('score')
+			return parse_score(await self.get_command_output())
+		return None
+
+	async def get_command_output(self):
+		return normalize_output(await self.process_manager.get_raw_output())
+
+	async def quit(self):
+		if self.game_loaded_properly == True:
+			await self.process_manager.quit()
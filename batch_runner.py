@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import argparse
+from multiprocessing import Pool
+from textPlayer import TextPlayer
+
+'''
+ Runs command scripts against many games in parallel, one worker process per core.
+
+ Each game gets its own script from --script-dir (a file named after the game, e.g. zork1.txt) if
+ one exists, otherwise the default command list. Workers play their games with
+ wait_for_prompt=True so every transcript is complete, and the transcripts and get_score()
+ results of all games are written to a single JSON results file.
+
+ Usage: python batch_runner.py                           (every game in games/)
+        python batch_runner.py zork1.z5 zork2.z5 --commands walkthrough.txt
+        python batch_runner.py --script-dir scripts --processes 8 --output results.json
+'''
+
+DEFAULT_COMMANDS = ['go west', 'go east', 'go east', 'go east', 'look']
+DEFAULT_OUTPUT = 'batch_results.json'
+BATCH_PROMPT_TIMEOUT = 2.0
+
+def list_games():
+    return sorted(f for f in os.listdir('games') if f.endswith('.z5'))
+
+def read_command_file(input_filename):
+    with open(input_filename, 'r') as f:
+        return [command for command in f.read().split('\n') if command.strip()]
+
+def find_commands(game_filename, script_dir, default_commands):
+    if script_dir != None:
+        script = os.path.join(script_dir, os.path.splitext(game_filename)[0] + '.txt')
+        if os.path.exists(script):
+            return read_command_file(script)
+    return default_commands
+
+# Worker: plays one game from start to finish and returns its results
+def run_game(job):
+    game_filename, commands, prompt_timeout = job
+    result = {'game': game_filename, 'start_output': None, 'transcript': [], 'score': None, 'seconds': 0.0, 'error': None}
+    start_time = time.monotonic()
+    player = TextPlayer(game_filename, wait_for_prompt=True, prompt_timeout=prompt_timeout)
+    try:
+        result['start_output'] = player.run()
+        for command in commands:
+            result['transcript'].append({'command': command, 'output': player.execute_command(command)})
+        result['score'] = player.get_score()
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        player.close()
+    result['seconds'] = round(time.monotonic() - start_time, 3)
+    return result
+
+def run_batch(games=None, default_commands=DEFAULT_COMMANDS, script_dir=None, processes=None,
+              output_filename=DEFAULT_OUTPUT, prompt_timeout=BATCH_PROMPT_TIMEOUT):
+    if not games:
+        games = list_games()
+    jobs = [(game, find_commands(game, script_dir, default_commands), prompt_timeout) for game in games]
+
+    start_time = time.monotonic()
+    results = []
+    with Pool(processes) as pool:
+        # Games vary a lot in length, so hand them out one at a time as workers free up
+        for game_num, result in enumerate(pool.imap_unordered(run_game, jobs), 1):
+            status = result['error'] if result['error'] else 'score ' + str(result['score'])
+            print(game_num, result['game'], status, '(' + str(result['seconds']) + 's)', flush=True)
+            results.append(result)
+    results.sort(key=lambda result: result['game'])
+
+    summary = {
+        'games': len(results),
+        'errors': sum(1 for result in results if result['error']),
+        'seconds': round(time.monotonic() - start_time, 3),
+        'results': results,
+    }
+    if output_filename != None:
+        with open(output_filename, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run command scripts against games in parallel.')
+    parser.add_argument('games', nargs='*', help='game files in games/ (default: all of them)')
+    parser.add_argument('--commands', help='command file used for every game without its own script')
+    parser.add_argument('--script-dir', help='directory of per-game command files named <game>.txt')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='consolidated results file')
+    parser.add_argument('--prompt-timeout', type=float, default=BATCH_PROMPT_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    default_commands = read_command_file(args.commands) if args.commands else DEFAULT_COMMANDS
+    summary = run_batch(args.games, default_commands, args.script_dir, args.processes, args.output, args.prompt_timeout)
+    print(f"{summary['games']} games, {summary['errors']} errors in {summary['seconds']}s -> {args.output}")
+    return 1 if summary['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
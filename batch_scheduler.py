@@ -0,0 +1,117 @@
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Thread, Condition
+from llm_client import LLMBackend
+
+'''
+ Class Summary: BatchScheduler([llm_client backend], [maximum batch size], [maximum wait in seconds])
+ Collects the chat requests of many concurrent game sessions and sends them to the backend
+ together, so the inference server works on a full batch instead of one game at a time.
+
+ It is a backend itself, so it can be passed to llm_client.set_client and every run_game_loop
+ thread blocks in chat() as before. A dispatcher thread waits for the first pending request, then
+ up to max_wait seconds more for others, and sends at most max_batch_size of them at once.
+ Backends that can batch (batched = True) get one chat_batch call; for the others the requests
+ go out in parallel over the backend's pooled connection, one per server slot (for Ollama, set
+ OLLAMA_NUM_PARALLEL to at least max_batch_size). Requests arriving meanwhile wait for the next
+ batch. Streaming, tags and version go straight to the backend.
+
+ Methods:    chat([request body]), blocks until the batch holding the request is answered
+             submit([request body]), returns a Future for the response
+             mean_batch_size(), the average number of requests per dispatched batch
+             close()
+'''
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT = 0.05
+
+class BatchScheduler(LLMBackend):
+    def __init__(self, backend, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.pending = deque()
+        self.condition = Condition()
+        self.closed = False
+        self.batches = 0
+        self.requests = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_batch_size)
+        self.thread = Thread(target=self.dispatch_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def complete(self, data):
+        return self.submit(data).result()
+
+    def submit(self, data):
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError('BatchScheduler is closed')
+            self.pending.append((data, future))
+            self.condition.notify()
+        return future
+
+    # Blocks until there is work, then gathers a batch; returns None once closed and drained
+    def next_batch(self):
+        with self.condition:
+            while not self.pending and not self.closed:
+                self.condition.wait()
+            if not self.pending:
+                return None
+            deadline = time.monotonic() + self.max_wait
+            while len(self.pending) < self.max_batch_size and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            count = min(len(self.pending), self.max_batch_size)
+            return [self.pending.popleft() for _ in range(count)]
+
+    def dispatch_loop(self):
+        while True:
+            batch = self.next_batch()
+            if batch == None:
+                return
+            self.batches += 1
+            self.requests += len(batch)
+            self.dispatch(batch)
+
+    def dispatch(self, batch):
+        requests = [data for data, _ in batch]
+        if self.backend.batched:
+            try:
+                responses = self.backend.chat_batch(requests)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            for (_, future), response in zip(batch, responses):
+                future.set_result(response)
+            return
+        running = [self.executor.submit(self.backend.chat, data) for data in requests]
+        for (_, future), result in zip(batch, running):
+            try:
+                future.set_result(result.result())
+            except Exception as e:
+                future.set_exception(e)
+
+    def mean_batch_size(self):
+        return self.requests / self.batches if self.batches else 0.0
+
+    def chat_stream(self, data):
+        return self.backend.chat_stream(data)
+
+    def tags(self):
+        return self.backend.tags()
+
+    def version(self):
+        return self.backend.version()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.executor.shutdown()
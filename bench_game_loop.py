@@ -0,0 +1,62 @@
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from threading import Thread
+from textPlayer import TextPlayer
+from llm_client import StubBackend, set_client
+from batch_scheduler import BatchScheduler
+import zork_chat
+
+'''
+ Benchmark for the game side of zork_chat.run_game_loop: prompt building, history upkeep,
+ background evaluation and the dfrotz round trips, with llm_client.StubBackend answering for the
+ model so no server or GPU is needed. Reports actions per second with no pause between actions.
+
+ With more than one session, that many games play at once and their requests go through a
+ batch_scheduler.BatchScheduler; the stub's latency is then paid once per batch.
+
+ Usage: python bench_game_loop.py [number of steps] [stub latency in seconds] [game file] [sessions]
+'''
+
+def bench(steps=200, latency=0.0, game='zork1.z5', sessions=1):
+    backend = StubBackend(latency=latency, seed=0)
+    scheduler = None
+    if sessions > 1:
+        backend = scheduler = BatchScheduler(backend, max_batch_size=sessions)
+    set_client(backend)
+    players = [TextPlayer(game, wait_for_prompt=True) for _ in range(sessions)]
+    if not all(player.game_loaded_properly for player in players):
+        return None, None
+    threads = [Thread(target=zork_chat.run_game_loop, args=(player, steps, 0)) for player in players]
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(io.StringIO()):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        for player in players:
+            player.close()
+        if scheduler != None:
+            scheduler.close()
+    return time.perf_counter() - start, scheduler
+
+def main(argv):
+    steps = int(argv[1]) if len(argv) > 1 else 200
+    latency = float(argv[2]) if len(argv) > 2 else 0.0
+    game = argv[3] if len(argv) > 3 else 'zork1.z5'
+    sessions = int(argv[4]) if len(argv) > 4 else 1
+    elapsed, scheduler = bench(steps, latency, game, sessions)
+    if elapsed == None:
+        print('Could not start ' + game)
+        return 1
+    total = steps * sessions
+    print('%d steps in %.2fs: %.1f steps/s (stub latency %.3fs, %d sessions)' % (total, elapsed, total / elapsed, latency, sessions))
+    if scheduler != None:
+        print('%d batches, %.1f requests per batch' % (scheduler.batches, scheduler.mean_batch_size()))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
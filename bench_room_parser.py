@@ -0,0 +1,78 @@
+import os
+import re
+import sys
+import json
+import timeit
+from room_parser import get_parser, is_movement_command
+
+'''
+ Micro-benchmark for room_parser.RoomParser against the extract_room_name / is_movement_command
+ heuristics it replaced in zork_chat. The parser does more (objects and exits as well as the
+ room), and runs on every turn rather than only after movement commands.
+
+ The turns come from the recorded transcripts in transcripts/ (see transcript.py), so a run
+ covers every game recorded there; without transcripts a few Zork room descriptions are used.
+
+ Usage: python bench_room_parser.py [transcript directory] [number of passes]
+'''
+
+SAMPLE_TURNS = [
+    ('north', 'North of House\nYou are facing the north side of a white house. There is no door here, and all the\nwindows are boarded up. To the north a narrow path winds through the trees.\n'),
+    ('open mailbox', 'Opening the small mailbox reveals a leaflet.\n'),
+    ('west', 'Living Room\nYou are in the living room. There is a doorway to the east, a wooden door with\nstrange gothic lettering to the west, which appears to be nailed shut, a trophy\ncase, and a large oriental rug in the center of the room.\nAbove the trophy case hangs an elvish sword of great antiquity.\nA battery-powered brass lantern is on the trophy case.\n'),
+    ('take lamp', 'Taken.\n'),
+    ('xyzzy', "I don't know the word \"xyzzy\".\n"),
+    ('look', 'Kitchen\nYou are in the kitchen of the white house. A table seems to have been used\nrecently for the preparation of food. A passage leads to the west and a dark\nstaircase can be seen leading upward. A dark chimney leads down and to the east\nis a small window which is open.\nOn the table is an elongated brown sack, smelling of hot peppers.\nA bottle is sitting on the table.\nThe glass bottle contains:\n  A quantity of water\n'),
+]
+
+def legacy_is_movement_command(command):
+    directions = ["n", "north", "s", "south", "e", "east", "w", "west", "up", "down", "ne", "northwest", "se", "southeast", "sw", "southwest", "nw", "northeast"]
+    return command.lower().strip() in directions
+
+def legacy_extract_room_name(output):
+    first_line = output.split("\n")[0].strip()
+    if first_line and first_line[0].isupper() and "I don't understand" not in first_line and "I can't" not in first_line:
+        return first_line
+    room_pattern = re.search(r"(You are in|You're in|This is) (the )?(.*?)(\.|$)", output)
+    if room_pattern:
+        return room_pattern.group(3).strip()
+    return None
+
+def load_turns(directory):
+    turns = []
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.jsonl'):
+                with open(os.path.join(directory, name)) as f:
+                    records = [json.loads(line) for line in f if line.strip()]
+                game = records[0]['game']
+                turns.extend((game, record['command'], record['output']) for record in records[1:])
+    if not turns:
+        turns = [('zork1.z5', command, output) for command, output in SAMPLE_TURNS]
+    return turns
+
+def legacy_pass(turns):
+    for _, command, output in turns:
+        if legacy_is_movement_command(command):
+            legacy_extract_room_name(output)
+
+def parser_pass(turns):
+    for game, command, output in turns:
+        is_movement_command(command)
+        get_parser(game).parse(output)
+
+def main(argv):
+    directory = argv[1] if len(argv) > 1 else 'transcripts'
+    passes = int(argv[2]) if len(argv) > 2 else 200
+    turns = load_turns(directory)
+    games = len(set(game for game, _, _ in turns))
+    print(f'{len(turns)} turns from {games} games, {passes} passes')
+    legacy = timeit.timeit(lambda: legacy_pass(turns), number=passes)
+    parsed = timeit.timeit(lambda: parser_pass(turns), number=passes)
+    per_turn = 1e6 / (len(turns) * passes)
+    print(f'legacy (room only, movement turns only): {legacy * per_turn:.2f} us/turn')
+    print(f'room_parser (room, objects, exits, every turn): {parsed * per_turn:.2f} us/turn')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
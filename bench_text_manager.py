@@ -0,0 +1,62 @@
+import re
+import sys
+import timeit
+from text_manager import parse_turn
+
+'''
+ Micro-benchmark for the per-turn output cleanup in TextManager (parse_turn, which splits off the
+ status line and normalizes the text), against the chained-replace / per-turn re.search version
+ it replaced.
+
+ The sample is raw dfrotz output for a long curses.z5 room description: status line padded to
+ the screen width, blank lines, indented text and the trailing prompt. Longer outputs repeat it.
+
+ Usage: python bench_text_manager.py [number of turns per size]
+'''
+
+STATUS_LINE = ' Attic' + ' ' * 54 + 'Score: 0' + ' ' * 8 + 'Moves: 12\n\n'
+ROOM_TEXT = '''Attic
+The attic is unfinished, with bare plaster and laths in the walls, and dusty
+rafters overhead. Old furniture is heaped up everywhere under dustsheets, and
+around the edges of the room are smaller boxes and bundles.  A dusty window
+looks out onto the south lawn, and a brass handle glints in one corner.
+
+    "Tomorrow, and tomorrow, and tomorrow,
+     Creeps in this petty pace from day to day"
+
+You can see a tea chest (which is closed), a photograph and an old rug here.
+
+'''
+
+def legacy_get_command_output(command_output):
+    command_output = command_output.replace('\n\n', '\n').replace('>', ' ').replace('<', ' ')
+    while '  ' in command_output:
+        command_output = command_output.replace('  ', ' ')
+    return command_output
+
+def legacy_clean_command_output(text):
+    regex_list = ['[0-9]+/[0-9+]', 'Score:[ ]*[-]*[0-9]+', 'Moves:[ ]*[0-9]+',
+                 'Turns:[ ]*[0-9]+', '[0-9]+:[0-9]+ [AaPp][Mm]', r' [0-9]+ \.']
+    for regex in regex_list:
+        matchObj = re.search(regex, text, re.M|re.I)
+        if matchObj != None:
+            text = text[matchObj.end() + 1:]
+    return text
+
+def legacy_turn(raw_output):
+    return legacy_clean_command_output(legacy_get_command_output(raw_output))
+
+def current_turn(raw_output):
+    return parse_turn(raw_output).text
+
+def main(turns=20000):
+    print('chars  legacy us/turn  current us/turn  speedup')
+    for repeats in (1, 4, 16):
+        raw_output = STATUS_LINE + ROOM_TEXT * repeats + '>'
+        assert legacy_turn(raw_output) == current_turn(raw_output)
+        legacy = min(timeit.repeat(lambda: legacy_turn(raw_output), number=turns, repeat=3)) / turns * 1e6
+        current = min(timeit.repeat(lambda: current_turn(raw_output), number=turns, repeat=3)) / turns * 1e6
+        print(f'{len(raw_output):5d}  {legacy:14.2f}  {current:15.2f}  {legacy / current:6.2f}x')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
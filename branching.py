@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+'''
+ Branching helpers for lookahead and tree search.
+
+ branch() clones a running game by restoring one in-memory snapshot into fresh interpreters,
+ which costs one save plus one restore per child instead of replaying the command history.
+ With a game_pool.GamePool the children come from already-started interpreters, so a branch
+ costs little more than the restore itself.
+
+ Example:
+    children = player.branch(4, pool)
+    outputs = execute_in_parallel(children, ['north', 'south', 'east', 'west'])
+'''
+
+MAX_BRANCH_WORKERS = 16
+# Restores tried per child before branch() gives up on it
+RESTORE_ATTEMPTS = 2
+
+def start_child(player, snapshot, pool):
+    if pool != None:
+        child = pool.acquire(player.game_filename)
+    else:
+        child = type(player)(player.game_filename, **player.player_options)
+        child.run()
+    for _ in range(RESTORE_ATTEMPTS):
+        if child.restore(snapshot) != None:
+            return child
+    # A failed restore can leave the game at its filename prompt, where 'quit' would be a filename
+    child.close()
+    raise RuntimeError('Could not restore the snapshot into a new ' + player.game_filename + ' player')
+
+# Returns count independent players, each in the state of snapshot (default: player's current state).
+# Raises RuntimeError if a child can't be restored; the children already started are closed
+def branch(player, count=1, pool=None, snapshot=None):
+    if count < 1:
+        return []
+    if snapshot == None:
+        snapshot = player.snapshot()
+    if snapshot == None:
+        return []
+    with ThreadPoolExecutor(max_workers=min(count, MAX_BRANCH_WORKERS)) as executor:
+        futures = [executor.submit(start_child, player, snapshot, pool) for _ in range(count)]
+    children = [future.result() for future in futures if future.exception() == None]
+    errors = [future.exception() for future in futures if future.exception() != None]
+    if errors:
+        for child in children:
+            child.close()
+        raise errors[0]
+    return children
+
+# Sends commands[i] to players[i], all at once, and returns the outputs in the same order
+def execute_in_parallel(players, commands):
+    with ThreadPoolExecutor(max_workers=min(max(len(players), 1), MAX_BRANCH_WORKERS)) as executor:
+        return list(executor.map(lambda pair: pair[0].execute_command(pair[1]), zip(players, commands)))
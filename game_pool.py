@@ -0,0 +1,98 @@
+from threading import Lock
+from queue import Queue, Empty
+from concurrent.futures import ThreadPoolExecutor
+from textPlayer import TextPlayer
+
+'''
+ Class Summary: GamePool([number of warm players per game])
+ Keeps interpreters that are already started and past the intro (TextPlayer.run() has been
+ called) for each game, so a new episode can send its first command immediately. Players are
+ handed out once and never returned; every acquire() starts a replacement in the background.
+ The intro text a player was started with is in player.start_output.
+
+ Methods:    warm([game file], [size]), start keeping size players ready for the game
+            acquire([game file], [timeout]), returns a started TextPlayer
+            close(), kills every player still waiting in the pool
+
+ Any other keyword arguments are passed on to TextPlayer, e.g. GamePool(4, wait_for_prompt=True).
+'''
+
+class GamePool:
+    def __init__(self, size=2, refill_workers=4, **player_options):
+        self.size = size
+        self.player_options = player_options
+        self.ready = {}
+        self.sizes = {}
+        self.starting = {}
+        self.lock = Lock()
+        self.executor = ThreadPoolExecutor(max_workers=refill_workers)
+        self.closed = False
+
+    # Sets how many ready players to keep for a game and starts them in the background
+    def warm(self, game_filename, size=None):
+        with self.lock:
+            if game_filename not in self.ready:
+                self.ready[game_filename] = Queue()
+                self.starting[game_filename] = 0
+            self.sizes[game_filename] = self.size if size == None else size
+        self.refill(game_filename)
+
+    def refill(self, game_filename):
+        with self.lock:
+            if self.closed:
+                return
+            missing = self.sizes[game_filename] - self.ready[game_filename].qsize() - self.starting[game_filename]
+            missing = max(missing, 0)
+            self.starting[game_filename] += missing
+        for _ in range(missing):
+            self.executor.submit(self.start_player, game_filename)
+
+    def new_player(self, game_filename):
+        player = TextPlayer(game_filename, **self.player_options)
+        player.run()
+        return player
+
+    def start_player(self, game_filename):
+        try:
+            player = self.new_player(game_filename)
+        except Exception:
+            # Wake up any waiter; acquire() retries in its own thread and surfaces the error
+            player = None
+        with self.lock:
+            self.starting[game_filename] -= 1
+            closed = self.closed
+        if closed and player != None:
+            player.close()
+        else:
+            self.ready[game_filename].put(player)
+
+    # Returns a warm player, waiting up to timeout for one that is still starting before
+    # falling back to starting one in the caller's thread
+    def acquire(self, game_filename, timeout=None):
+        if game_filename not in self.ready:
+            self.warm(game_filename)
+        try:
+            player = self.ready[game_filename].get_nowait()
+        except Empty:
+            with self.lock:
+                in_flight = self.starting[game_filename] > 0
+            try:
+                if not in_flight:
+                    raise Empty
+                player = self.ready[game_filename].get(timeout=timeout)
+            except Empty:
+                player = None
+        if player == None:
+            player = self.new_player(game_filename)
+        self.refill(game_filename)
+        return player
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        self.executor.shutdown(wait=True)
+        for ready in self.ready.values():
+            while not ready.empty():
+                player = ready.get_nowait()
+                if player != None:
+                    player.close()
@@ -0,0 +1,102 @@
+import re
+
+'''
+ Class Summary: HistoryWindow([token budget])
+ Chat history for the actor, bounded by an (approximate) token budget instead of a message count,
+ so verbose games don't overflow the model's context and terse games still get a long memory.
+
+ When the messages go over the budget, the oldest are evicted in one chunk (down to
+ trim_to * budget) rather than one per turn, so the start of the prompt stays the same between
+ evictions. Every evicted turn is condensed into a one-line entry of a rolling summary
+ ("> take lamp: Taken."), which is kept as the first message within its own budget.
+
+ Iterating, len() and indexing see the summary message (if any) followed by the kept messages,
+ so a HistoryWindow can be used wherever the list of messages was.
+
+ Methods:    append([message dict])
+             messages(), returns the summary message and the kept messages as a list
+             tokens, the estimated size of the kept messages
+'''
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_SUMMARY_TOKEN_BUDGET = 500
+ACTION_PATTERN = re.compile(r'^Action:[ \t]*(.*)$', re.M)
+
+# Rough count for English text with a Llama-style tokenizer; pass count_tokens for exact counts
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+def first_line(text, max_length=80):
+    for line in text.split('\n'):
+        line = line.strip()
+        if line:
+            return line if len(line) <= max_length else line[:max_length - 3] + '...'
+    return ''
+
+class HistoryWindow:
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, summary_token_budget=DEFAULT_SUMMARY_TOKEN_BUDGET,
+                 trim_to=0.75, count_tokens=estimate_tokens):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.trim_to = trim_to
+        self.count_tokens = count_tokens
+        self.entries = []
+        self.tokens = 0
+        self.summary_lines = []
+        self.summary_tokens = 0
+        self.summary_message = None
+
+    def append(self, message):
+        size = self.count_tokens(message['content'])
+        self.entries.append((message, size))
+        self.tokens += size
+        if self.tokens > self.token_budget:
+            self.evict()
+
+    def evict(self):
+        target = self.token_budget * self.trim_to
+        evicted = 0
+        # Evict whole turns (an action and the output after it), but always keep the newest message
+        while evicted < len(self.entries) - 1 and (self.tokens > target or self.entries[evicted][0]['role'] != 'assistant'):
+            self.tokens -= self.entries[evicted][1]
+            evicted += 1
+        self.summarize([message for message, _ in self.entries[:evicted]])
+        del self.entries[:evicted]
+
+    def summarize(self, messages):
+        # An assistant message holds 'Action: ...'; the user message after it holds its result
+        action = None
+        for message in messages:
+            if message['role'] == 'assistant':
+                matchObj = ACTION_PATTERN.search(message['content'])
+                action = matchObj.group(1).strip() if matchObj else first_line(message['content'])
+            elif action != None:
+                self.add_summary_line('> ' + action + ': ' + first_line(message['content']))
+                action = None
+            else:
+                self.add_summary_line(first_line(message['content']))
+        while self.summary_tokens > self.summary_token_budget and len(self.summary_lines) > 1:
+            self.summary_tokens -= self.count_tokens(self.summary_lines.pop(0))
+        if self.summary_lines:
+            self.summary_message = {'role': 'user', 'content': 'Summary of earlier turns:\n' + '\n'.join(self.summary_lines)}
+
+    def add_summary_line(self, line):
+        self.summary_lines.append(line)
+        self.summary_tokens += self.count_tokens(line)
+
+    def messages(self):
+        kept = [message for message, _ in self.entries]
+        if self.summary_message != None:
+            return [self.summary_message] + kept
+        return kept
+
+    def __iter__(self):
+        return iter(self.messages())
+
+    def __len__(self):
+        return len(self.entries) + (1 if self.summary_message != None else 0)
+
+    def __getitem__(self, index):
+        return self.messages()[index]
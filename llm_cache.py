@@ -0,0 +1,92 @@
+import json
+import time
+import sqlite3
+import hashlib
+from threading import Lock
+
+'''
+ Class Summary: ResponseCache([path of the SQLite file], [maximum size in bytes])
+ Persistent cache of LLM chat replies, keyed by a hash of everything that determines the reply:
+ model, options (temperature, seed, ...), response format and messages. Replaying a game from the
+ same start state sends the same requests, so those replies come from disk without the model.
+ When the stored replies grow past max_bytes, the least recently used are deleted.
+
+ Methods:    get([request body]), returns the cached response or None
+             put([request body], [response])
+             clear()
+             close()
+'''
+
+DEFAULT_CACHE_FILE = 'llm_cache.sqlite'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Evict down to this fraction of max_bytes, so eviction runs rarely
+EVICT_TO = 0.9
+
+def request_key(data):
+    keyed = {
+        'model': data.get('model'),
+        'options': data.get('options'),
+        'format': data.get('format'),
+        'messages': data.get('messages'),
+    }
+    return hashlib.sha256(json.dumps(keyed, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS responses ('
+                                    'key TEXT PRIMARY KEY, response TEXT NOT NULL, '
+                                    'size INTEGER NOT NULL, last_used REAL NOT NULL)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)')
+        self.total_bytes = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, data):
+        key = request_key(data)
+        with self.lock:
+            row = self.connection.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            if row == None:
+                return None
+            with self.connection:
+                self.connection.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, data, response):
+        key = request_key(data)
+        encoded = json.dumps(response, ensure_ascii=False)
+        size = len(encoded.encode('utf-8'))
+        with self.lock:
+            with self.connection:
+                row = self.connection.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+                if row != None:
+                    self.total_bytes -= row[0]
+                self.connection.execute('INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)',
+                                        (key, encoded, size, time.time()))
+                self.total_bytes += size
+                if self.total_bytes > self.max_bytes:
+                    self.evict()
+
+    # Deletes least recently used replies until the cache is back under EVICT_TO * max_bytes
+    def evict(self):
+        target = self.max_bytes * EVICT_TO
+        rows = self.connection.execute('SELECT key, size FROM responses ORDER BY last_used').fetchall()
+        doomed = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            doomed.append((key,))
+            self.total_bytes -= size
+        self.connection.executemany('DELETE FROM responses WHERE key = ?', doomed)
+
+    def clear(self):
+        with self.lock:
+            with self.connection:
+                self.connection.execute('DELETE FROM responses')
+            self.total_bytes = 0
+
+    def close(self):
+        self.connection.close()
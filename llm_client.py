@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import random
+import requests
+from threading import Lock
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+'''
+ Backends for the LLM that plays the game. They all take and return Ollama /api/chat bodies, so
+ the callers in zork_chat and the GUIs don't change with the backend.
+
+ Class Summary: LLMBackend()
+ Methods:    chat([request body]), returns the decoded JSON response ({"message": {"content": ...}})
+            chat_stream([request body]), returns an iterator over the pieces of the message content
+              as they are generated
+            chat_batch([list of request bodies]), returns their responses in order
+            tags(), returns {"models": [{"name": ...}, ...]}
+            version(), returns {"version": ...}
+            close()
+ With a llm_cache.ResponseCache as cache, non-streaming chat replies are served from disk when the
+ same request has been answered before. Backends with batched = True answer a whole chat_batch
+ in one go; for the others it is the same as calling chat on each request.
+
+ Class Summary: OllamaBackend([server url])
+ Ollama API. All calls go through one pooled requests.Session, so the TCP connection to the server
+ is kept alive and reused from turn to turn instead of being opened again for every request.
+ Connection errors and 502/503/504 responses are retried. LLMClient is the same class.
+
+ Class Summary: OpenAIBackend([server url], [api key])
+ Any OpenAI-compatible /v1/chat/completions server (vLLM, llama.cpp server, LM Studio, ...).
+ Ollama options and "format" are translated to their OpenAI equivalents.
+
+ Class Summary: StubBackend([list of actions], [latency in seconds], [seed])
+ Deterministic stand-in for a model, without a server or a GPU. Answers every request after
+ latency seconds, with the scripted actions in turn (or random ones from a seeded generator) in
+ whatever JSON shape the request's "format" asks for. stub_server.py serves it over the Ollama API.
+
+ get_client() returns the process-wide backend used by zork_chat and the GUIs, chosen by the
+ LLM_BACKEND environment variable (ollama, openai or stub) with LLM_URL and LLM_API_KEY.
+ set_client([backend]) replaces it, e.g. with a StubBackend for benchmarks.
+'''
+
+OLLAMA_URL = os.environ.get('LLM_URL', "http://localhost:11434")
+OPENAI_URL = os.environ.get('LLM_URL', "http://localhost:8000/v1")
+DEFAULT_BACKEND = os.environ.get('LLM_BACKEND', 'ollama')
+DEFAULT_MODEL = os.environ.get('LLM_MODEL', "llama3.2")
+# The GUIs have always defaulted to llama3
+GUI_DEFAULT_MODEL = os.environ.get('LLM_MODEL', "llama3")
+# Models offered in the GUIs' settings
+MODEL_CHOICES = [GUI_DEFAULT_MODEL] + [model for model in ('llama3', 'llama3.2', 'mistral', 'codellama') if model != GUI_DEFAULT_MODEL]
+# (connect, read) timeouts in seconds; generation on a busy server can take a while
+DEFAULT_TIMEOUT = (5, 300)
+DEFAULT_RETRIES = 2
+DEFAULT_POOL_SIZE = 16
+
+# Ollama option name -> OpenAI request field
+OPENAI_OPTIONS = {'temperature': 'temperature', 'top_p': 'top_p', 'seed': 'seed', 'num_predict': 'max_tokens', 'stop': 'stop'}
+
+STUB_ACTIONS = ['look', 'inventory', 'north', 'south', 'east', 'west', 'up', 'down', 'open mailbox', 'take all']
+STUB_CHUNK_SIZE = 8
+
+class LLMBackend:
+    cache = None
+    batched = False
+
+    def chat(self, data):
+        if self.cache != None:
+            response = self.cache.get(data)
+            if response != None:
+                return response
+        response = self.complete(data)
+        if self.cache != None:
+            self.cache.put(data, response)
+        return response
+
+    # Answers one request, without the cache
+    def complete(self, data):
+        raise NotImplementedError
+
+    def chat_batch(self, requests):
+        return [self.chat(data) for data in requests]
+
+    # Backends that can't stream hand back the whole reply as one piece
+    def chat_stream(self, data):
+        yield self.complete(data)['message']['content']
+
+    def tags(self):
+        return {'models': []}
+
+    def version(self):
+        return {'version': type(self).__name__}
+
+    def close(self):
+        pass
+
+class HTTPBackend(LLMBackend):
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, pool_size=DEFAULT_POOL_SIZE, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cache = cache
+        self.session = requests.Session()
+        # Connection errors and gateway statuses are retried, read timeouts are not: a re-POST after
+        # a timed-out generation would start the whole generation again on the server
+        retry = Retry(total=retries, read=0, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, path):
+        response = self.session.get(self.base_url + path, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def post(self, path, data):
+        response = self.session.post(self.base_url + path, json=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def post_stream(self, path, data):
+        response = self.session.post(self.base_url + path, json=data, timeout=self.timeout, stream=True)
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        self.session.close()
+
+class OllamaBackend(HTTPBackend):
+    def __init__(self, base_url=OLLAMA_URL, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, pool_size=DEFAULT_POOL_SIZE, cache=None):
+        super().__init__(base_url, timeout, retries, pool_size, cache)
+
+    def complete(self, data):
+        return self.post('/api/chat', data)
+
+    def chat_stream(self, data):
+        return iter_message_content(self.post_stream('/api/chat', dict(data, stream=True)))
+
+    def tags(self):
+        return self.get('/api/tags')
+
+    def version(self):
+        return self.get('/api/version')
+
+LLMClient = OllamaBackend
+
+class OpenAIBackend(HTTPBackend):
+    def __init__(self, base_url=OPENAI_URL, api_key=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, pool_size=DEFAULT_POOL_SIZE, cache=None):
+        super().__init__(base_url, timeout, retries, pool_size, cache)
+        api_key = api_key or os.environ.get('LLM_API_KEY')
+        if api_key:
+            self.session.headers['Authorization'] = 'Bearer ' + api_key
+
+    def complete(self, data):
+        reply = self.post('/chat/completions', openai_request(data))
+        message = reply['choices'][0]['message']
+        return {'model': reply.get('model', data.get('model')),
+                'message': {'role': message.get('role', 'assistant'), 'content': message.get('content') or ''},
+                'done': True}
+
+    def chat_stream(self, data):
+        return iter_event_content(self.post_stream('/chat/completions', openai_request(data, stream=True)))
+
+    def tags(self):
+        return {'models': [{'name': model['id']} for model in self.get('/models').get('data', [])]}
+
+    def version(self):
+        self.get('/models')
+        return {'version': 'openai'}
+
+class StubBackend(LLMBackend):
+    # One latency covers a whole batch, like a batched forward pass on a GPU
+    batched = True
+
+    def __init__(self, actions=None, latency=0.0, seed=None, model=DEFAULT_MODEL, cache=None):
+        self.actions = list(actions) if actions else None
+        self.latency = latency
+        self.model = model
+        self.cache = cache
+        self.random = random.Random(seed)
+        self.count = 0
+        self.lock = Lock()
+
+    def next_action(self):
+        with self.lock:
+            self.count += 1
+            if self.actions:
+                return self.actions[(self.count - 1) % len(self.actions)]
+            return self.random.choice(STUB_ACTIONS)
+
+    def reply_content(self, data):
+        action = self.next_action()
+        format = data.get('format')
+        if isinstance(format, dict) and format.get('properties'):
+            fields = {}
+            for name in format['properties']:
+                fields[name] = action if name == 'action' else 'Stub ' + name + ' for step ' + str(self.count) + '.'
+            return json.dumps(fields)
+        if format != None:
+            return json.dumps({'action': action, 'thinking': 'Stub thinking for step ' + str(self.count) + '.'})
+        # Plain requests (the GUIs) ask for THINKING:/ACTION: lines
+        return 'THINKING: Stub thinking for step ' + str(self.count) + '.\nACTION: ' + action
+
+    def reply(self, data):
+        return {'model': data.get('model', self.model),
+                'message': {'role': 'assistant', 'content': self.reply_content(data)},
+                'done': True}
+
+    def complete(self, data):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return self.reply(data)
+
+    def chat_batch(self, requests):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return [self.reply(data) for data in requests]
+
+    def chat_stream(self, data):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        content = self.reply_content(data)
+        for start in range(0, len(content), STUB_CHUNK_SIZE):
+            yield content[start:start + STUB_CHUNK_SIZE]
+
+    def tags(self):
+        return {'models': [{'name': self.model}]}
+
+    def version(self):
+        return {'version': 'stub'}
+
+def openai_request(data, stream=False):
+    request = {'model': data.get('model'), 'messages': data.get('messages', []), 'stream': stream}
+    options = data.get('options') or {}
+    for name, openai_name in OPENAI_OPTIONS.items():
+        if name in options:
+            request[openai_name] = options[name]
+    format = data.get('format')
+    if format == 'json':
+        request['response_format'] = {'type': 'json_object'}
+    elif isinstance(format, dict):
+        request['response_format'] = {'type': 'json_schema', 'json_schema': {'name': 'reply', 'schema': format}}
+    return request
+
+# Ollama streams one JSON object per line, each holding the next piece of the message
+def iter_message_content(response):
+    with response:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            yield chunk.get('message', {}).get('content', '')
+            if chunk.get('done'):
+                break
+
+# OpenAI-compatible servers stream server-sent events: 'data: {...}' lines, then 'data: [DONE]'
+def iter_event_content(response):
+    with response:
+        for line in response.iter_lines():
+            if not line.startswith(b'data:'):
+                continue
+            payload = line[5:].strip()
+            if payload == b'[DONE]':
+                break
+            choices = json.loads(payload).get('choices') or [{}]
+            yield choices[0].get('delta', {}).get('content') or ''
+
+def make_backend(name=DEFAULT_BACKEND, **options):
+    if name == 'ollama':
+        return OllamaBackend(**options)
+    if name == 'openai':
+        return OpenAIBackend(**options)
+    if name == 'stub':
+        return StubBackend(**options)
+    raise ValueError('Unknown LLM backend: ' + str(name))
+
+_client = None
+
+def get_client():
+    global _client
+    if _client == None:
+        _client = make_backend()
+    return _client
+
+def set_client(backend):
+    global _client
+    _client = backend
+    return backend
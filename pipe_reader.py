@@ -0,0 +1,115 @@
+import os
+import re
+import time
+import selectors
+from threading import Condition, Lock
+
+# Byte-level twin of process_manager.PROMPT_PATTERN, so buffers are only decoded once per response
+PROMPT_PATTERN_BYTES = re.compile(rb'(?:^|\n)>\s*$|[:?] $')
+READ_SIZE = 65536
+# Longest single select in wait_for_prompts, in case a plain poll() elsewhere drains our pipe
+POLL_SLICE = 0.05
+
+'''
+ Class Summary: PipeReader()
+ Services the stdout pipes of any number of dfrotz processes from a single thread. Pipes are
+ switched to non-blocking mode and drained with os.read in bulk whenever the selector reports
+ them readable; bytes accumulate per pipe until a caller takes the whole response.
+
+ Methods:    register([pipe]), unregister([pipe])
+            poll([timeout]), returns the pipes that received data
+            has_prompt([pipe]), True once the buffered output ends in a prompt
+            wait_for_prompts([pipes], [timeout]), returns the pipes whose response is complete
+            take([pipe]), returns and clears the buffered bytes
+
+ Threads can share a reader: while one thread selects in wait_for_prompts, the others wait on a
+ condition that is notified whenever a buffer grows, so data read on another thread's behalf
+ wakes its owner at once.
+'''
+
+class PipeReader:
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.buffers = {}
+        self.closed = set()
+        self.lock = Lock()
+        self.changed = Condition(self.lock)
+        # True while a thread is in wait_for_prompts' select
+        self.polling = False
+
+    def register(self, pipe):
+        os.set_blocking(pipe.fileno(), False)
+        with self.lock:
+            self.buffers[pipe] = bytearray()
+            self.selector.register(pipe, selectors.EVENT_READ)
+
+    def unregister(self, pipe):
+        with self.lock:
+            if pipe in self.buffers and pipe not in self.closed:
+                self.selector.unregister(pipe)
+            self.closed.discard(pipe)
+            self.buffers.pop(pipe, None)
+
+    # Reads everything currently available on the ready pipes, waiting up to timeout for one
+    def poll(self, timeout=0):
+        ready = []
+        if not self.selector.get_map():
+            return ready
+        # Only hold the lock while touching buffers, so threads sharing a reader can select at once
+        for key, _ in self.selector.select(timeout):
+            pipe = key.fileobj
+            with self.lock:
+                if pipe not in self.buffers or pipe in self.closed:
+                    continue
+                try:
+                    data = os.read(key.fd, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                if data:
+                    self.buffers[pipe] += data
+                else:
+                    # End of file, the game process has exited
+                    self.selector.unregister(pipe)
+                    self.closed.add(pipe)
+                self.changed.notify_all()
+            ready.append(pipe)
+        return ready
+
+    def is_closed(self, pipe):
+        return pipe in self.closed
+
+    def has_prompt(self, pipe):
+        return PROMPT_PATTERN_BYTES.search(self.buffers[pipe]) != None
+
+    def wait_for_prompts(self, pipes, timeout):
+        deadline = time.monotonic() + timeout
+        pending = set(pipes)
+        complete = []
+        while True:
+            for pipe in list(pending):
+                if self.has_prompt(pipe) or self.is_closed(pipe):
+                    pending.discard(pipe)
+                    complete.append(pipe)
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                return complete
+            with self.lock:
+                if self.polling:
+                    # Another thread is selecting and will notify when it reads anything; checked
+                    # under the lock so output read since the loop's check is not missed
+                    if not any(self.has_prompt(pipe) or self.is_closed(pipe) for pipe in pending):
+                        self.changed.wait(remaining)
+                    continue
+                self.polling = True
+            try:
+                self.poll(min(remaining, POLL_SLICE))
+            finally:
+                with self.lock:
+                    self.polling = False
+                    self.changed.notify_all()
+
+    def take(self, pipe):
+        with self.lock:
+            data = bytes(self.buffers[pipe])
+            self.buffers[pipe].clear()
+        return data
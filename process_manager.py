@@ -1,14 +1,34 @@
 import os
+import re
+import time
+import codecs
 import signal
 from signal import signal, SIGPIPE, SIG_DFL
 from subprocess import PIPE, Popen
-from threading import Thread
+from threading import Thread, current_thread, main_thread
 from queue import Queue, Empty
 
+# dfrotz blocks on stdin after printing its '>' prompt (or a question such as
+# 'Please enter a filename [zork1.qzl]: '), so seeing one means the response is complete
+PROMPT_PATTERN = re.compile(r'(?:^|\n)>\s*$|[:?] $')
+# Only the '>' prompt, i.e. the game is waiting for its next command
+COMMAND_PROMPT_PATTERN = re.compile(r'(?:^|\n)>\s*$')
+DEFAULT_PROMPT_TIMEOUT = 5.0
+# End of one response in a stream of pipelined responses
+RESPONSE_END = '\n>'
+
 class ProcessManager:
-    def __init__(self, game_filename):
-        signal(SIGPIPE, SIG_DFL)
+    def __init__(self, game_filename, wait_for_prompt=False, prompt_timeout=DEFAULT_PROMPT_TIMEOUT, pipe_reader=None, seed=None):
+        # Signal handlers can only be installed from the main thread
+        if current_thread() is main_thread():
+            signal(SIGPIPE, SIG_DFL)
         self.game_loaded_properly = True
+        self.wait_for_prompt = wait_for_prompt
+        self.prompt_timeout = prompt_timeout
+        # A shared pipe_reader.PipeReader replaces the per-game reader thread and queue
+        self.pipe_reader = pipe_reader
+        # Fixed random seed for dfrotz (-s), so the same commands always give the same output
+        self.seed = seed
 
         # Verify that specified game file exists, else limit functionality
         if game_filename == None or not os.path.exists('games/' + game_filename):
@@ -23,7 +43,12 @@ class ProcessManager:
     def start_game(self):
         if self.game_loaded_properly == True:
             # Start the game process with both 'standard in' and 'standard out' pipes
-            self.game_process = Popen(['./frotz/dfrotz', 'games/' + self.game_filename], stdin=PIPE, stdout=PIPE)
+            seed_args = ['-s', str(self.seed)] if self.seed != None else []
+            self.game_process = Popen(['./frotz/dfrotz'] + seed_args + ['games/' + self.game_filename], stdin=PIPE, stdout=PIPE)
+
+            if self.pipe_reader != None:
+                self.pipe_reader.register(self.game_process.stdout)
+                return True
 
             # Create Queue object
             self.output_queue = Queue()
@@ -37,8 +62,11 @@ class ProcessManager:
         return False
 
     def enqueue_pipe_output(self, output, queue):
-        for line in iter(output.readline, b''):
-            queue.put(line.decode('utf-8', errors='ignore'))
+        # Read whatever is available rather than whole lines, so the prompt (which has
+        # no trailing newline) reaches the queue as soon as dfrotz prints it
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        for chunk in iter(lambda: output.read1(4096), b''):
+            queue.put(decoder.decode(chunk))
         output.close()
 
     def send_command(self, command):
@@ -48,7 +76,31 @@ class ProcessManager:
             return True
         return False
 
+    # Sends every command in one write, without waiting for the responses in between
+    def send_commands(self, commands):
+        if self.game_loaded_properly == True:
+            data = ''.join(command + '\n' for command in commands).encode()
+            # Written from a thread, as a long script can fill the pipe while dfrotz waits for
+            # its output to be read
+            t = Thread(target=self.write_input, args=(data,))
+            t.daemon = True
+            t.start()
+            return True
+        return False
+
+    def write_input(self, data):
+        try:
+            self.game_process.stdin.write(data)
+            self.game_process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            pass
+
     def get_raw_output(self):
+        if self.pipe_reader != None:
+            return self.get_selected_output()
+        if self.wait_for_prompt:
+            return self.get_output_until_prompt()
+
         command_output = ''
         output_continues = True
 
@@ -63,6 +115,77 @@ class ProcessManager:
 
         return command_output
 
+    def get_output_until_prompt(self, timeout=None):
+        if timeout == None:
+            timeout = self.prompt_timeout
+        deadline = time.monotonic() + timeout
+        command_output = ''
+
+        # Block until the game prints its prompt, the deadline passes or the game exits
+        while not PROMPT_PATTERN.search(command_output):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                chunk = self.output_queue.get(timeout=min(remaining, .1))
+            except Empty:
+                if self.game_process.poll() != None and self.output_queue.empty():
+                    break
+            else:
+                command_output += chunk
+
+        return command_output
+
+    # Reads the responses to count pipelined commands: until count '>' prompts have gone by, or
+    # no output has arrived for timeout seconds
+    def get_output_until_prompts(self, count, timeout=None):
+        if timeout == None:
+            timeout = self.prompt_timeout
+        deadline = time.monotonic() + timeout
+        command_output = ''
+        prompts = 0
+
+        while prompts < count:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            chunk = self.read_chunk(min(remaining, .1))
+            if chunk:
+                # Only count prompts that end in the new chunk
+                checked = len(command_output)
+                command_output += chunk
+                prompts += command_output.count(RESPONSE_END, max(0, checked - 1))
+                deadline = time.monotonic() + timeout
+            elif self.game_process.poll() != None:
+                break
+
+        return command_output
+
+    # Returns whatever output arrives within timeout seconds, '' if none
+    def read_chunk(self, timeout):
+        if self.pipe_reader != None:
+            pipe = self.game_process.stdout
+            self.pipe_reader.poll(timeout)
+            return self.pipe_reader.take(pipe).decode('utf-8', errors='ignore')
+        try:
+            return self.output_queue.get(timeout=timeout)
+        except Empty:
+            return ''
+
+    def get_selected_output(self, timeout=None):
+        pipe = self.game_process.stdout
+        if self.wait_for_prompt:
+            if timeout == None:
+                timeout = self.prompt_timeout
+            self.pipe_reader.wait_for_prompts([pipe], timeout)
+        else:
+            # Same contract as the queue reader: stop at the first 1 ms without new output
+            while pipe in self.pipe_reader.poll(.001):
+                pass
+
+        # Decode once per response rather than once per line
+        return self.pipe_reader.take(pipe).decode('utf-8', errors='ignore')
+
     def quit(self):
         if self.game_loaded_properly == True:
             self.game_process.stdin.write(b'quit\n')
@@ -72,3 +195,13 @@ class ProcessManager:
         if self.game_process.stdin != None:
             self.game_process.stdin.write(b'n\n')
             self.game_process.stdin.flush()
+        if self.pipe_reader != None:
+            self.pipe_reader.unregister(self.game_process.stdout)
+
+    # Stops the interpreter without going through the in-game quit dialogue
+    def close(self):
+        if self.game_loaded_properly == True and getattr(self, 'game_process', None) != None:
+            if self.pipe_reader != None:
+                self.pipe_reader.unregister(self.game_process.stdout)
+            self.game_process.kill()
+            self.game_process.wait()
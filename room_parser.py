@@ -0,0 +1,130 @@
+import re
+from functools import lru_cache
+from text_manager import looks_like_room_title
+from world_map import normalize_direction
+
+'''
+ Class Summary: RoomParser([config dict])
+ Pulls the room title, the objects mentioned as being here and the exits named out of a turn's
+ output, cheaply enough to run on every turn whatever the command was, so the agent gets
+ structured state without spending a 'look' on it. The patterns are compiled once per game;
+ each object pattern starts with a literal, which the regex engine can search for quickly, and
+ exits are found with a set lookup per word rather than a case-insensitive regex. A direction
+ only counts as an exit after a cue (EXIT_CUES, 'to the') or as the next item of such a list.
+
+ The config holds the game's quirks (see DEFAULT_CONFIG); GAME_CONFIGS overrides it per game file
+ and get_parser([game file]) returns the cached parser for a game. Object patterns must each
+ have exactly one group, the object phrase, which is split on commas and 'and'.
+
+ Methods:    parse([output text]), returns a RoomState(room, objects, exits); objects and exits
+               are only looked for when the text describes a room
+             room_name([output text]), just the room, or None
+
+ is_movement_command([command]) tells whether a command is a bare direction ('n', 'go north').
+'''
+
+DEFAULT_CONFIG = {
+    # First lines that read like titles but are messages
+    'not_titles': ("I don't", "I can't", "You can't", "You don't", "You have", "Taken", "Dropped", "Ok", "Done"),
+    # Lines skipped over when looking for the title (opening banners)
+    'banner': (),
+    'object_patterns': (
+        r'There (?:is|are) (.+?) here\.',
+        r'You (?:can )?(?:also )?see (.+?) here\.',
+        r'^(?=[ATS])(?:An?|The|Some) (.+?) (?:is|are) (?:sitting |lying |resting )?(?:here|on the [^.\n]+)\.',
+        r'^On the [^,\n]+ (?:is|are) ([^,.\n]+)',
+    ),
+    # Descriptions without a title line ("You are in a maze of twisty little passages.")
+    'room_pattern': r"(?:You are in|You're in|This is) (?:the )?(.*?)(?:\.|$)",
+}
+
+GAME_CONFIGS = {
+    # The opening banner ("ZORK I: The Great Underground Empire", ...) comes before the first room
+    'zork1.z5': {'banner': ('ZORK', 'Copyright', 'Revision')},
+}
+
+MAX_TITLE_LINE = 8
+# Words naming an exit, and the direction each one means
+EXIT_WORDS = {}
+for direction in ('north', 'south', 'east', 'west', 'northeast', 'northwest', 'southeast', 'southwest', 'up', 'down'):
+    EXIT_WORDS[direction] = EXIT_WORDS[direction + 'ward'] = EXIT_WORDS[direction + 'wards'] = direction
+# Words a direction must follow to name an exit ('leads north', 'leading upward', 'to the west'),
+# so 'boarded up' or 'west of a white house' are not taken for exits
+EXIT_CUES = frozenset(['lead', 'leads', 'leading', 'head', 'heads', 'heading', 'run', 'runs', 'running',
+                       'wind', 'winds', 'winding', 'go', 'goes', 'going', 'continue', 'continues', 'climb',
+                       'climbs', 'exit', 'exits', 'toward', 'towards'])
+LIST_WORDS = frozenset(['and', 'or'])
+WORD_SEPARATORS = ',.;:!?"()'
+ARTICLE_PATTERN = re.compile(r'^(?:an?|the|some) ', re.I)
+LIST_SEPARATOR_PATTERN = re.compile(r',\s*(?:and\s+)?|\s+and\s+')
+
+def is_movement_command(command):
+    return normalize_direction(command) != None
+
+def find_exits(text):
+    text = text.lower()
+    for separator in WORD_SEPARATORS:
+        if separator in text:
+            text = text.replace(separator, ' ')
+    exits = []
+    words = text.split()
+    listed = -2
+    for i in [i for i, word in enumerate(words) if word in EXIT_WORDS]:
+        direction = EXIT_WORDS[words[i]]
+        previous = words[i - 1] if i > 0 else ''
+        # A cue word, 'to the', or the next item of a list of exits ('to the west and north')
+        if (previous in EXIT_CUES or (previous == 'the' and i > 1 and words[i - 2] == 'to')
+                or listed == i - 1 or (listed == i - 2 and previous in LIST_WORDS)):
+            listed = i
+            if direction not in exits:
+                exits.append(direction)
+    return exits
+
+def split_objects(phrase):
+    return [ARTICLE_PATTERN.sub('', item.strip()) for item in LIST_SEPARATOR_PATTERN.split(phrase) if item.strip()]
+
+class RoomState:
+    def __init__(self, room=None, objects=None, exits=None):
+        self.room = room
+        self.objects = objects or []
+        self.exits = exits or []
+
+    def __repr__(self):
+        return 'RoomState(room=%r, objects=%r, exits=%r)' % (self.room, self.objects, self.exits)
+
+class RoomParser:
+    def __init__(self, config=None):
+        config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.not_titles = tuple(config['not_titles'])
+        self.banner = tuple(config['banner'])
+        self.room_pattern = re.compile(config['room_pattern'])
+        self.object_patterns = [re.compile(pattern, re.M) for pattern in config['object_patterns']]
+
+    def room_name(self, text):
+        # The title is the first line after any banner
+        for line in text.split('\n', MAX_TITLE_LINE)[:MAX_TITLE_LINE]:
+            line = line.strip()
+            if not line or (self.banner and line.startswith(self.banner)):
+                continue
+            if looks_like_room_title(line) and not line.startswith(self.not_titles):
+                return line
+            break
+        matchObj = self.room_pattern.search(text)
+        if matchObj != None:
+            return matchObj.group(1).strip()
+        return None
+
+    def parse(self, text):
+        room = self.room_name(text)
+        # Objects and exits are only read off room descriptions; most turns have none
+        if room == None:
+            return RoomState()
+        objects = []
+        for pattern in self.object_patterns:
+            for phrase in pattern.findall(text):
+                objects.extend(split_objects(phrase))
+        return RoomState(room, objects, find_exits(text))
+
+@lru_cache(maxsize=None)
+def get_parser(game_filename=None):
+    return RoomParser(GAME_CONFIGS.get(game_filename))
@@ -0,0 +1,34 @@
+import os
+import hashlib
+import tempfile
+from itertools import count
+
+# dfrotz can only save to a file, so save files pass through tmpfs when it is available and
+# are deleted as soon as their bytes are in memory
+SNAPSHOT_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+_snapshot_ids = count()
+
+'''
+ Class Summary: GameSnapshot([name of the game file], [Quetzal save bytes])
+ An in-memory copy of a game's state, taken with TextPlayer.snapshot() and put back with
+ TextPlayer.restore(snapshot). Snapshots can be restored any number of times, into the player
+ that took them or into any other player of the same game.
+'''
+
+class GameSnapshot:
+    def __init__(self, game_filename, data):
+        self.game_filename = game_filename
+        self.data = data
+        self.digest = hashlib.sha1(data).hexdigest()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __eq__(self, other):
+        return isinstance(other, GameSnapshot) and self.game_filename == other.game_filename and self.data == other.data
+
+    def __hash__(self):
+        return hash((self.game_filename, self.digest))
+
+def new_snapshot_path():
+    return os.path.join(SNAPSHOT_DIR, 'textplayer-' + str(os.getpid()) + '-' + str(next(_snapshot_ids)) + '.qzl')
@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+from zmachine import StoryFile, story_path
+
+'''
+ Class Summary: StoryIndex([path of an index file])
+ What a batch wants to know about a story file (header metadata, the dictionary words, object
+ names and the object tree, abbreviations) decoded once and kept on disk in a compact index, so
+ later runs map the index instead of decoding the story file again.
+
+ Index files live in INDEX_DIR, named after the SHA-1 of the story file, so an edited or replaced
+ story gets a fresh index and identical copies under different names share one. The layout is a
+ small fixed header (MAGIC, FORMAT_VERSION, metadata length), the metadata as JSON, then the
+ sections it lists by offset and length: 'words', 'objects' and 'abbreviations' are NUL-separated
+ UTF-8 strings and 'tree' holds (parent, sibling, child) as unsigned 16-bit triples per object.
+ Sections are only decoded when asked for.
+
+ Attributes: game, sha1, version, release, serial, checksum, resolution, alphabets,
+             separators, object_count, word_count
+ Methods:    words(), returns the dictionary words as a frozenset
+             object_names(), returns the objects' short names, object 1 first
+             object_tree(), returns a list of (parent, sibling, child), object 1 first
+             abbreviations(), returns the abbreviation strings
+             close()
+
+ load_index([game file or path]) returns the StoryIndex for a game, building it if needed;
+ index_all([games directory]) does that for every story file in the directory.
+
+ Usage: python story_index.py [games directory]
+'''
+
+INDEX_DIR = '.story_index'
+INDEX_SUFFIX = '.zidx'
+MAGIC = b'ZIDX'
+FORMAT_VERSION = 2
+# magic, format version, length of the metadata JSON
+PREAMBLE = struct.Struct('>4sHI')
+TREE_ENTRY = struct.Struct('>HHH')
+STORY_SUFFIXES = ('.z1', '.z2', '.z3', '.z4', '.z5', '.z6', '.z7', '.z8', '.dat')
+
+# Open indexes by story hash, shared by every load in this process
+loaded_indexes = {}
+
+def file_sha1(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def index_path(sha1, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, sha1 + INDEX_SUFFIX)
+
+def join_strings(strings):
+    return '\0'.join(strings).encode('utf-8')
+
+def split_strings(data):
+    return data.decode('utf-8').split('\0') if data else []
+
+# Decodes a story file and returns the bytes of its index
+def build_index(path, sha1=None):
+    story = StoryFile(path)
+    separators, entries = story.dictionary()
+    objects = story.objects()
+    sections = [
+        ('words', join_strings(word for word, _ in entries)),
+        ('objects', join_strings(name for name, _, _, _ in objects)),
+        ('abbreviations', join_strings(story.abbreviations())),
+        ('tree', b''.join(TREE_ENTRY.pack(parent, sibling, child) for _, parent, sibling, child in objects)),
+    ]
+    metadata = {
+        'game': os.path.basename(path),
+        'sha1': sha1 or file_sha1(path),
+        'version': story.version,
+        'release': story.release,
+        'serial': story.serial,
+        'checksum': story.checksum,
+        'resolution': story.resolution,
+        'alphabets': story.alphabets,
+        'separators': separators,
+        'object_count': len(objects),
+        'word_count': len(entries),
+        'sections': {},
+    }
+    offset = 0
+    for name, data in sections:
+        metadata['sections'][name] = [offset, len(data)]
+        offset += len(data)
+    encoded = json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+    return PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded)) + encoded + b''.join(data for _, data in sections)
+
+def write_index(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Written aside and renamed, so parallel runs never map a half-written index
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+class StoryIndex:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, metadata_length = PREAMBLE.unpack_from(self.map, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self.map.close()
+            raise ValueError('Not a story index (or an old format): ' + path)
+        start = PREAMBLE.size + metadata_length
+        metadata = json.loads(self.map[PREAMBLE.size:start].decode('utf-8'))
+        self.sections = {name: (start + offset, length) for name, (offset, length) in metadata.pop('sections').items()}
+        for name, value in metadata.items():
+            setattr(self, name, value)
+        self.decoded = {}
+
+    def section(self, name):
+        offset, length = self.sections[name]
+        return self.map[offset:offset + length]
+
+    def words(self):
+        if 'words' not in self.decoded:
+            self.decoded['words'] = frozenset(split_strings(self.section('words')))
+        return self.decoded['words']
+
+    def object_names(self):
+        return split_strings(self.section('objects'))
+
+    def object_tree(self):
+        return list(TREE_ENTRY.iter_unpack(self.section('tree')))
+
+    def abbreviations(self):
+        return split_strings(self.section('abbreviations'))
+
+    def close(self):
+        self.map.close()
+
+def load_index(game, index_dir=INDEX_DIR):
+    path = game if os.path.exists(game) else story_path(game)
+    sha1 = file_sha1(path)
+    index = loaded_indexes.get(sha1)
+    if index != None:
+        return index
+    cached_path = index_path(sha1, index_dir)
+    try:
+        index = StoryIndex(cached_path)
+    except (OSError, ValueError, struct.error):
+        write_index(cached_path, build_index(path, sha1))
+        index = StoryIndex(cached_path)
+    loaded_indexes[sha1] = index
+    return index
+
+def index_all(games_dir='games', index_dir=INDEX_DIR):
+    indexes = {}
+    for name in sorted(os.listdir(games_dir)):
+        if name.lower().endswith(STORY_SUFFIXES):
+            indexes[name] = load_index(os.path.join(games_dir, name), index_dir)
+    return indexes
+
+def main(argv):
+    games_dir = argv[1] if len(argv) > 1 else 'games'
+    start = time.perf_counter()
+    indexes = index_all(games_dir)
+    for name, index in indexes.items():
+        index.words()
+        index.object_names()
+    elapsed = time.perf_counter() - start
+    words = sum(index.word_count for index in indexes.values())
+    objects = sum(index.object_count for index in indexes.values())
+    print(f'{len(indexes)} games, {words} words, {objects} objects loaded in {elapsed * 1000:.1f} ms')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,100 @@
+import sys
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from llm_client import StubBackend, DEFAULT_MODEL
+
+'''
+ Local stand-in for an Ollama server, answering /api/chat, /api/tags and /api/version from a
+ llm_client.StubBackend: scripted or seeded random actions after a fixed latency. Point zork_chat
+ or the GUIs at it to benchmark the game side without a GPU or a real model:
+
+     python stub_server.py --port 11435 --latency 0.2 --script scripts/zork1.txt
+     LLM_URL=http://localhost:11435 python zork_chat.py
+
+ Usage: python stub_server.py [--host HOST] [--port PORT] [--latency SECONDS] [--script FILE]
+                              [--seed SEED] [--model NAME]
+'''
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 11435
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    backend = None
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self.send_json(self.backend.tags())
+        elif self.path == '/api/version':
+            self.send_json(self.backend.version())
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path != '/api/chat':
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        model = data.get('model', self.backend.model)
+        # Ollama streams unless told otherwise
+        if data.get('stream', True) == False:
+            self.send_json(self.backend.chat(data))
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        for piece in self.backend.chat_stream(data):
+            self.write_line({'model': model, 'message': {'role': 'assistant', 'content': piece}, 'done': False})
+        self.write_line({'model': model, 'message': {'role': 'assistant', 'content': ''}, 'done': True})
+        self.close_connection = True
+
+    def send_json(self, body):
+        encoded = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def write_line(self, body):
+        self.wfile.write(json.dumps(body).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(backend, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    handler = type('BoundStubHandler', (StubHandler,), {'backend': backend})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def read_actions(filename):
+    with open(filename) as f:
+        return [line.strip() for line in f if line.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve scripted or random game actions over the Ollama API.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before each reply')
+    parser.add_argument('--script', help='file of actions, one per line, answered in turn')
+    parser.add_argument('--seed', type=int, help='seed for the random actions')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='model name reported by /api/tags')
+    args = parser.parse_args(argv)
+
+    actions = read_actions(args.script) if args.script else None
+    server = make_server(StubBackend(actions, args.latency, args.seed, args.model), args.host, args.port)
+    print('Stub LLM server on http://' + args.host + ':' + str(server.server_address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,11 @@
 import os, sys, signal, time, re
 from signal import signal, SIGPIPE, SIG_DFL
 from subprocess import PIPE, Popen
-from threading import Thread
+from threading import Thread, current_thread, main_thread
 from queue import Queue, Empty
 from text_manager import TextManager
+from process_manager import DEFAULT_PROMPT_TIMEOUT
+from branching import branch
 
 '''
  Currently, for games that require several clicks to get start info, it doesn't scrape everything. Lost.z5 is one. The first couple commands will not produce the expected output.
@@ -12,17 +14,37 @@ from text_manager import TextManager
  Methods:	run()
  			parse_and_execute_command_file([text file containing a list of commands])
  			execute_command([command string])
+			execute_turn([command string]), returns a TurnResult with score, moves and room parsed out
+			execute_turns([list of commands]), sends them all at once, returns a TurnResult per response
 			get_score(), returns None if no score found, returns ('2', '100') if 2/100 found
+			get_tracked_score(), the same from the status line of the last turn, without sending 'score'
+			get_normalized_score(), tracked score divided by the game's entry in max_scores.txt
+			snapshot(), returns a GameSnapshot of the current state held in memory
+			restore([GameSnapshot]), returns the game to that state; None if the restore failed
+			branch([count], [GamePool]), returns count independent players cloned from this one
 			quit()
+			close(), kills the interpreter without the quit dialogue
+
+ Pass wait_for_prompt=True to block on each command until dfrotz prints its '>' prompt
+ (or prompt_timeout seconds pass) instead of stopping at the first 1 ms gap in the output.
+ Pass a shared pipe_reader.PipeReader to read the game's output without a dedicated thread.
+ Pass a transposition_cache.TranspositionCache to answer repeated look/inventory/exits in a state
+ already seen from memory (branches and pooled players of this one share its answers only when a
+ seed is set). Pass a seed to fix dfrotz's random numbers, so the same commands always give the
+ same output.
 '''
 
 class TextPlayer:
 
 	# Initializes the class, sets variables
-	def __init__(self, game_filename):
-		signal(SIGPIPE, SIG_DFL)
-		self.text_manager = TextManager(game_filename)
+	def __init__(self, game_filename, wait_for_prompt=False, prompt_timeout=DEFAULT_PROMPT_TIMEOUT, pipe_reader=None, transposition_cache=None, seed=None):
+		if current_thread() is main_thread():
+			signal(SIGPIPE, SIG_DFL)
+		self.text_manager = TextManager(game_filename, wait_for_prompt, prompt_timeout, pipe_reader, transposition_cache, seed)
 		self.game_loaded_properly = self.text_manager.game_loaded_properly
+		self.start_output = None
+		self.player_options = {'wait_for_prompt': wait_for_prompt, 'prompt_timeout': prompt_timeout, 'pipe_reader': pipe_reader,
+			'transposition_cache': transposition_cache, 'seed': seed}
 
 		# Verify that specified game file exists, else limit functionality
 		if game_filename == None or not os.path.exists('games/' + game_filename):
@@ -37,24 +59,72 @@ class TextPlayer:
 	# Runs the game
 	def run(self):
 		if self.game_loaded_properly == True:
-			return self.text_manager.run()
+			self.start_output = self.text_manager.run()
+			return self.start_output
 
 	# Parses through a text list of commands (or a single command) and executes them
 	def parse_and_execute_command_file(self, input_filename):
 		if self.game_loaded_properly == True:
-			self.text_manager.parse_and_execute_command_file(input_filename)
+			return self.text_manager.parse_and_execute_command_file(input_filename)
+		return []
 
 	# Send a command to the game and return the output
 	def execute_command(self, command):
 		if self.game_loaded_properly == True:
 			return self.text_manager.execute_command(command)
 
+	# Send a command to the game and return a TurnResult (status line fields, room title and text)
+	def execute_turn(self, command):
+		if self.game_loaded_properly == True:
+			return self.text_manager.execute_turn(command)
+
+	# Sends a list of commands in one burst and returns a TurnResult for each (see transcript.py)
+	def execute_turns(self, commands):
+		if self.game_loaded_properly == True:
+			return self.text_manager.execute_turns(commands)
+		return []
+
 	# Returns the current score in a game
 	def get_score(self):
 		if self.game_loaded_properly == True:
 			return self.text_manager.get_score()
 		return None
 
+	# Returns the score from the last status line, at no extra interpreter round trip
+	def get_tracked_score(self):
+		if self.game_loaded_properly == True:
+			return self.text_manager.get_tracked_score()
+		return None
+
+	# Returns the tracked score as a fraction of the game's maximum score
+	def get_normalized_score(self):
+		if self.game_loaded_properly == True:
+			return self.text_manager.get_normalized_score()
+		return None
+
+	# Captures the current game state in memory, returns a GameSnapshot or None
+	def snapshot(self):
+		if self.game_loaded_properly == True:
+			return self.text_manager.snapshot()
+		return None
+
+	# Puts the game back into a state captured by snapshot() and returns the game's output, or
+	# None if the game did not restore it
+	def restore(self, snapshot):
+		if self.game_loaded_properly == True:
+			return self.text_manager.restore(snapshot)
+
+	# Returns count independent copies of this game in its current state (see branching.py)
+	def branch(self, count=1, pool=None, snapshot=None):
+		if self.game_loaded_properly == True:
+			return branch(self, count, pool, snapshot)
+		return []
+
 	def quit(self):
 		if self.game_loaded_properly == True:
 			self.text_manager.quit()
+
+	# Kills the interpreter immediately, without the quit dialogue
+	def close(self):
+		if self.game_loaded_properly == True:
+			self.text_manager.close()
@@ -1,68 +1,302 @@
+import os
 import re
-from process_manager import ProcessManager
+import time
+from functools import lru_cache
+from process_manager import ProcessManager, DEFAULT_PROMPT_TIMEOUT, COMMAND_PROMPT_PATTERN, RESPONSE_END
+from snapshot import GameSnapshot, new_snapshot_path
+from transposition_cache import state_lineage, initial_state_key, restored_state_key, advance_state_key
+
+MAX_SCORES_FILE = 'max_scores.txt'
+
+# Output cleanup is kept at module level so other front ends (e.g. AsyncTextPlayer) share it
+FILENAME_PROMPT_PATTERN = re.compile(r'[^\n]*file ?name[^\n]*?: ', re.I)
+# First line of the game's answer to a restore that did not work ('Failed.', 'Restore failed.')
+RESTORE_FAILED_PATTERN = re.compile(r"\b(?:fail|error|can(?:no|')t)", re.I)
+SCORE_PATTERN = r'[0-9]+ [(]total [points ]*[out ]*of [a maximum of ]*[a possible ]*[0-9]+'
+MULTIPLE_SPACES = re.compile(' {2,}')
+# dfrotz prints the status line as its own line: the location, a gap of at least two spaces,
+# then 'Score: S Moves/Turns: M', a compact 'S/M', or a clock time
+STATUS_LINE_PATTERN = re.compile(
+    r'^[ >]*(?P<location>\S[^\n]*?)[ \t]{2,}(?:'
+    r'Score:[ \t]*(?P<score>-?[0-9]+)[ \t]+(?:Moves|Turns):[ \t]*(?P<moves>[0-9]+)'
+    r'|(?P<compact_score>-?[0-9]+)/(?P<compact_moves>[0-9]+)'
+    r'|(?:Time:[ \t]*)?(?P<time>[0-9]{1,2}:[0-9]{2}[ \t]*[AaPp][Mm])'
+    r')[ \t]*$', re.M|re.I)
+
+# Maps game file to its maximum score; games listed with '*' (no score) are left out
+@lru_cache(maxsize=None)
+def load_max_scores(max_scores_filename=MAX_SCORES_FILE):
+    max_scores = {}
+    if os.path.exists(max_scores_filename):
+        with open(max_scores_filename, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) == 2 and fields[1].isdigit():
+                    max_scores[fields[0]] = int(fields[1])
+    return max_scores
+
+# Text after the last match of pattern, or None if it does not occur
+def text_after(text, pattern):
+    end = None
+    for matchObj in pattern.finditer(text):
+        end = matchObj.end()
+    return None if end == None else text[end:]
+
+# The game asked for the filename, came back to its '>' prompt and did not report a failure
+def restore_succeeded(command_output):
+    answer = text_after(command_output, FILENAME_PROMPT_PATTERN)
+    if answer == None or not COMMAND_PROMPT_PATTERN.search(answer):
+        return False
+    first_line = answer.strip().split('\n', 1)[0]
+    return RESTORE_FAILED_PATTERN.search(first_line) == None
+
+def needs_keypress(start_output):
+    return 'Press' in start_output or 'press' in start_output or 'Hit' in start_output or 'hit' in start_output
+
+def parse_score(command_output):
+    matchObj = re.search(SCORE_PATTERN, command_output, re.M|re.I)
+    if matchObj != None:
+        score_words = matchObj.group().split(' ')
+        return int(score_words[0]), int(score_words[len(score_words)-1])
+    return None
+
+def normalize_output(command_output):
+    # Clean up the output but preserve newlines
+    command_output = command_output.replace('\n\n', '\n').replace('>', ' ').replace('<', ' ')
+    # Collapse every run of spaces in one pass, whatever its length, but preserve newlines
+    return MULTIPLE_SPACES.sub(' ', command_output)
+
+'''
+ Class Summary: TurnResult
+ One turn of dfrotz output, split into the status line fields and the game text.
+ Attributes: raw, the output exactly as dfrotz printed it
+             text, the cleaned game text, as returned by execute_command()
+             status_line, location, score, moves, time, None when the game has no such field
+             room, the room title heading the text (e.g. after a move or 'look'), or None
+'''
+
+class TurnResult:
+    def __init__(self, raw, text, status_line=None, location=None, score=None, moves=None, time=None, room=None):
+        self.raw = raw
+        self.text = text
+        self.status_line = status_line
+        self.location = location
+        self.score = score
+        self.moves = moves
+        self.time = time
+        self.room = room
+
+    def __repr__(self):
+        return 'TurnResult(location=%r, score=%r, moves=%r, time=%r, room=%r, text=%r)' % (
+            self.location, self.score, self.moves, self.time, self.room, self.text)
+
+def looks_like_room_title(line):
+    return (0 < len(line) < 50 and line[0].isupper() and line[-1] not in '.!?:,;"\')'
+            and "I don't" not in line and "I can't" not in line)
+
+# Splits raw output into a TurnResult. Only the status line itself is removed from the text,
+# so game text is never lost when a status field is missing or a number looks like one.
+def parse_turn(raw):
+    location = score = moves = time = status_line = room = None
+    # Leading spaces may or may not arrive with this response (split_responses gives them to the
+    # prompt before), so they are never part of the text
+    body = raw.lstrip(' ')
+    matchObj = STATUS_LINE_PATTERN.search(raw)
+    if matchObj != None:
+        status_line = matchObj.group().strip(' >')
+        location = matchObj.group('location').strip()
+        if matchObj.group('score') != None:
+            score, moves = int(matchObj.group('score')), int(matchObj.group('moves'))
+        elif matchObj.group('compact_score') != None:
+            score, moves = int(matchObj.group('compact_score')), int(matchObj.group('compact_moves'))
+        else:
+            time = MULTIPLE_SPACES.sub(' ', matchObj.group('time').upper())
+        # Anything before the status line is left over from the previous prompt
+        body = raw[matchObj.end():].lstrip('\n')
+    text = normalize_output(body)
+    first_line = text.lstrip('\n').split('\n', 1)[0].strip()
+    if looks_like_room_title(first_line):
+        room = first_line
+    return TurnResult(raw, text, status_line, location, score, moves, time, room)
+
+# Splits the output of pipelined commands into one raw response per command, each ending in its prompt
+def split_responses(raw_output):
+    responses = []
+    start = 0
+    while True:
+        end = raw_output.find(RESPONSE_END, start)
+        if end == -1:
+            break
+        end += len(RESPONSE_END)
+        while end < len(raw_output) and raw_output[end] in ' \t':
+            end += 1
+        responses.append(raw_output[start:end])
+        start = end
+    if raw_output[start:].strip():
+        responses.append(raw_output[start:])
+    return responses
 
 class TextManager:
-    def __init__(self, game_filename):
-        self.process_manager = ProcessManager(game_filename)
+    def __init__(self, game_filename, wait_for_prompt=False, prompt_timeout=DEFAULT_PROMPT_TIMEOUT, pipe_reader=None, transposition_cache=None, seed=None):
+        self.process_manager = ProcessManager(game_filename, wait_for_prompt, prompt_timeout, pipe_reader, seed)
         self.game_loaded_properly = self.process_manager.game_loaded_properly
+        self.last_turn = None
+        # Fingerprint of the game state, for the (optional) transposition cache
+        self.transposition_cache = transposition_cache
+        self.state_lineage = state_lineage(seed)
+        self.state_key = initial_state_key(game_filename or '', self.state_lineage)
+        # Score and moves are read off the status line of every turn, so they cost no extra command
+        self.score = None
+        self.moves = None
+        self.max_score = load_max_scores().get(game_filename)
 
     def run(self):
         if self.game_loaded_properly:
             if self.process_manager.start_game():
                 # Grab start info from game
-                start_output = self.get_command_output()
-                if 'Press' in start_output or 'press' in start_output or 'Hit' in start_output or 'hit' in start_output:
-                    start_output += self.execute_command(' \n')
+                raw_output = self.process_manager.get_raw_output()
+                self.track_turn(parse_turn(raw_output))
+                start_output = normalize_output(raw_output)
+                if needs_keypress(start_output):
+                    # One line per key: send_command adds the newline, and every extra line would get its own
+                    # response and prompt, leaving later reads a turn behind
+                    start_output += self.execute_command(' ')
                 if 'introduction' in start_output:
-                    start_output += self.execute_command('no\n')  # Parc
+                    start_output += self.execute_command('no')  # Parc
                 return start_output
         return None
 
+    # Runs every command in the file in turn (blank lines are skipped), printing and returning the outputs
     def parse_and_execute_command_file(self, input_filename):
+        outputs = []
         if self.game_loaded_properly:
             if (os.path.exists(input_filename)):
                 with open(input_filename, 'r') as f:
-                    commands = f.read()
-                    if '\n' in commands:
-                        for command in commands.split('\n'):
-                            print(self.execute_command(command))
-                    else:
-                        print(self.execute_command(commands))
+                    commands = [command for command in f.read().split('\n') if command.strip()]
+                for command in commands:
+                    output = self.execute_command(command)
+                    print(output)
+                    outputs.append(output)
+        return outputs
 
     def execute_command(self, command):
         if self.game_loaded_properly:
+            return self.execute_turn(command).text
+
+    # Like execute_command, but returns the whole TurnResult
+    def execute_turn(self, command):
+        if self.game_loaded_properly:
+            cache = self.transposition_cache
+            if cache != None and cache.is_cacheable(command):
+                turn = cache.get(self.state_key, command)
+                if turn != None:
+                    # A remembered answer's status line is from when it was recorded, so the tracked
+                    # score and moves are left alone
+                    self.last_turn = turn
+                    return turn
+                self.process_manager.send_command(command)
+                turn = parse_turn(self.process_manager.get_raw_output())
+                cache.put(self.state_key, command, turn)
+                return self.track_turn(turn)
             self.process_manager.send_command(command)
-            return self.clean_command_output(self.get_command_output())
+            self.state_key = advance_state_key(self.state_key, command)
+            return self.track_turn(parse_turn(self.process_manager.get_raw_output()))
+
+    # Sends all the commands in one write and splits the output at the prompts, returning a
+    # TurnResult per response. For scripts, where no command depends on the output before it
+    def execute_turns(self, commands):
+        if self.game_loaded_properly:
+            commands = list(commands)
+            self.process_manager.send_commands(commands)
+            raw_output = self.process_manager.get_output_until_prompts(len(commands))
+            cache = self.transposition_cache
+            for command in commands:
+                if cache == None or not cache.is_cacheable(command):
+                    self.state_key = advance_state_key(self.state_key, command)
+            return [self.track_turn(parse_turn(raw)) for raw in split_responses(raw_output)]
+        return []
+
+    def track_turn(self, turn):
+        self.last_turn = turn
+        if turn.score != None:
+            self.score = turn.score
+            self.moves = turn.moves
+        return turn
 
     def get_score(self):
         if self.game_loaded_properly:
             self.process_manager.send_command('score')
-            command_output = self.get_command_output()
-            score_pattern = r'[0-9]+ [(]total [points ]*[out ]*of [a maximum of ]*[a possible ]*[0-9]+'
-            matchObj = re.search(score_pattern, command_output, re.M|re.I)
-            if matchObj != None:
-                score_words = matchObj.group().split(' ')
-                return int(score_words[0]), int(score_words[len(score_words)-1])
+            score = parse_score(self.get_command_output())
+            if score != None:
+                self.score, self.max_score = score
+            return score
         return None
 
-    def clean_command_output(self, text):
-        regex_list = ['[0-9]+/[0-9+]', 'Score:[ ]*[-]*[0-9]+', 'Moves:[ ]*[0-9]+',
-                     'Turns:[ ]*[0-9]+', '[0-9]+:[0-9]+ [AaPp][Mm]', r' [0-9]+ \.']
-        for regex in regex_list:
-            matchObj = re.search(regex, text, re.M|re.I)
-            if matchObj != None:
-                text = text[matchObj.end() + 1:]
-        return text
+    # Last score seen on the status line, as (score, maximum score or None), without sending 'score'
+    def get_tracked_score(self):
+        if self.score == None:
+            return None
+        return self.score, self.max_score
 
-    def get_command_output(self):
-        command_output = self.process_manager.get_raw_output()
-        # Clean up the output but preserve newlines
-        command_output = command_output.replace('\n\n', '\n').replace('>', ' ').replace('<', ' ')
-        # Only replace multiple spaces with a single space, but preserve newlines
-        while '  ' in command_output:
-            command_output = command_output.replace('  ', ' ')
+    # Tracked score as a fraction of the game's maximum (from max_scores.txt or the last 'score')
+    def get_normalized_score(self):
+        if self.score == None or not self.max_score:
+            return None
+        return self.score / self.max_score
+
+    # Captures the game state as Quetzal bytes held in memory
+    def snapshot(self):
+        if self.game_loaded_properly:
+            path = new_snapshot_path()
+            # The filename goes out with the command, so saving costs a single round trip
+            self.process_manager.send_command('save\n' + path)
+            # As in restore(), a stale '>' must not end the read before the save has been answered
+            self.get_output_until_command_prompt(after=FILENAME_PROMPT_PATTERN)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.remove(path)
+                return GameSnapshot(self.process_manager.game_filename, data)
+        return None
+
+    def restore(self, snapshot):
+        if self.game_loaded_properly and snapshot != None and snapshot.game_filename == self.process_manager.game_filename:
+            path = new_snapshot_path()
+            with open(path, 'wb') as f:
+                f.write(snapshot.data)
+            try:
+                self.process_manager.send_command('restore\n' + path)
+                # A stale '>' must not end the read before the game has answered the filename prompt
+                command_output = self.get_output_until_command_prompt(after=FILENAME_PROMPT_PATTERN)
+            finally:
+                os.remove(path)
+            if not restore_succeeded(command_output):
+                # The game is in its old state, or an unknown one; either way not the snapshot's
+                self.state_key = advance_state_key(self.state_key, 'restore')
+                return None
+            self.state_key = restored_state_key(snapshot.digest, self.state_lineage)
+            return self.track_turn(parse_turn(FILENAME_PROMPT_PATTERN.sub('', command_output))).text
+        return None
+
+    # Keeps reading past intermediate questions (e.g. the filename prompt) until the '>' prompt;
+    # with after (a pattern), until a '>' prompt follows its last match
+    def get_output_until_command_prompt(self, after=None):
+        deadline = time.monotonic() + self.process_manager.prompt_timeout
+        command_output = ''
+        while time.monotonic() < deadline:
+            tail = command_output if after == None else text_after(command_output, after)
+            if tail != None and COMMAND_PROMPT_PATTERN.search(tail):
+                break
+            command_output += self.process_manager.get_raw_output()
         return command_output
 
+    def get_command_output(self):
+        return normalize_output(self.process_manager.get_raw_output())
+
     def quit(self):
         if self.game_loaded_properly:
             self.process_manager.quit()
+
+    def close(self):
+        if self.game_loaded_properly:
+            self.process_manager.close()
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import time
+import argparse
+from multiprocessing import Pool
+from textPlayer import TextPlayer
+from batch_runner import read_command_file
+
+'''
+ Recorded transcripts of a game, and fast replay to check a game still plays the same way.
+
+ A transcript is a JSON Lines file. The first line is a header,
+     {"version": 1, "game": "zork1.z5", "seed": 1, "start": <start output>}
+ and every further line is one turn,
+     {"command": "open mailbox", "output": ..., "score": 0, "moves": 1, "seconds": 0.004}
+
+ record() plays the commands one at a time (so each turn is timed) with dfrotz's random seed
+ fixed. replay() starts the game with the same seed, writes every command to dfrotz in one go,
+ splits the output at the prompts and compares each response with the recorded one.
+
+ Usage: python transcript.py record [game] [command file] [-o transcript file]
+        python transcript.py replay [transcript file]
+        python transcript.py check [transcript directory]    (every transcript, in parallel)
+'''
+
+TRANSCRIPT_VERSION = 1
+TRANSCRIPT_DIR = 'transcripts'
+DEFAULT_SEED = 1
+REPLAY_PROMPT_TIMEOUT = 2.0
+
+def record(game_filename, commands, seed=DEFAULT_SEED, prompt_timeout=REPLAY_PROMPT_TIMEOUT):
+    player = TextPlayer(game_filename, wait_for_prompt=True, prompt_timeout=prompt_timeout, seed=seed)
+    if not player.game_loaded_properly:
+        return None
+    transcript = {'version': TRANSCRIPT_VERSION, 'game': game_filename, 'seed': seed, 'entries': []}
+    try:
+        transcript['start'] = player.run()
+        for command in commands:
+            start_time = time.monotonic()
+            turn = player.execute_turn(command)
+            transcript['entries'].append({'command': command, 'output': turn.text, 'score': turn.score,
+                                          'moves': turn.moves, 'seconds': round(time.monotonic() - start_time, 4)})
+    finally:
+        player.close()
+    return transcript
+
+def write_transcript(filename, transcript):
+    header = {key: transcript[key] for key in ('version', 'game', 'seed', 'start')}
+    with open(filename, 'w') as f:
+        f.write(json.dumps(header) + '\n')
+        for entry in transcript['entries']:
+            f.write(json.dumps(entry) + '\n')
+
+def read_transcript(filename):
+    with open(filename, 'r') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    transcript = dict(lines[0])
+    transcript['entries'] = lines[1:]
+    return transcript
+
+# Replays a transcript in one burst; returns a result dict whose 'mismatches' lists every turn
+# that came out differently
+def replay(transcript, prompt_timeout=REPLAY_PROMPT_TIMEOUT):
+    game_filename = transcript['game']
+    entries = transcript['entries']
+    result = {'game': game_filename, 'commands': len(entries), 'mismatches': [], 'seconds': 0.0, 'error': None}
+    start_time = time.monotonic()
+    player = TextPlayer(game_filename, wait_for_prompt=True, prompt_timeout=prompt_timeout, seed=transcript.get('seed'))
+    if not player.game_loaded_properly:
+        result['error'] = 'could not load ' + game_filename
+        return result
+    try:
+        start = player.run()
+        if start != transcript.get('start'):
+            result['mismatches'].append({'turn': 0, 'command': None, 'expected': transcript.get('start'), 'actual': start})
+        turns = player.execute_turns([entry['command'] for entry in entries])
+        for turn_num, entry in enumerate(entries, 1):
+            turn = turns[turn_num - 1] if turn_num <= len(turns) else None
+            actual = turn.text if turn != None else None
+            if actual != entry['output'] or (turn != None and turn.score != entry['score']):
+                result['mismatches'].append({'turn': turn_num, 'command': entry['command'],
+                                             'expected': entry['output'], 'actual': actual})
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        player.close()
+    result['seconds'] = round(time.monotonic() - start_time, 3)
+    return result
+
+def replay_file(filename):
+    result = replay(read_transcript(filename))
+    result['transcript'] = filename
+    return result
+
+def check_all(directory=TRANSCRIPT_DIR, processes=None):
+    filenames = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.jsonl'))
+    with Pool(processes) as pool:
+        return list(pool.imap_unordered(replay_file, filenames))
+
+def print_result(result):
+    if result['error']:
+        status = 'error: ' + result['error']
+    elif result['mismatches']:
+        status = str(len(result['mismatches'])) + ' mismatches, first at turn ' + str(result['mismatches'][0]['turn'])
+    else:
+        status = 'ok'
+    print(result['game'], str(result['commands']) + ' commands', status, '(' + str(result['seconds']) + 's)', flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record game transcripts and replay them as regression checks.')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    record_parser = subparsers.add_parser('record', help='play a command file and save the transcript')
+    record_parser.add_argument('game')
+    record_parser.add_argument('commands')
+    record_parser.add_argument('-o', '--output', help='transcript file (default: transcripts/<game>.jsonl)')
+    record_parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    replay_parser = subparsers.add_parser('replay', help='replay one transcript and compare')
+    replay_parser.add_argument('transcript')
+    check_parser = subparsers.add_parser('check', help='replay every transcript in a directory')
+    check_parser.add_argument('directory', nargs='?', default=TRANSCRIPT_DIR)
+    check_parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.action == 'record':
+        transcript = record(args.game, read_command_file(args.commands), args.seed)
+        if transcript == None:
+            return 1
+        output = args.output or os.path.join(TRANSCRIPT_DIR, os.path.splitext(args.game)[0] + '.jsonl')
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        write_transcript(output, transcript)
+        print(str(len(transcript['entries'])) + ' turns -> ' + output)
+        return 0
+
+    results = [replay_file(args.transcript)] if args.action == 'replay' else check_all(args.directory, args.processes)
+    for result in results:
+        print_result(result)
+    return 1 if any(result['error'] or result['mismatches'] for result in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import uuid
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+
+'''
+ Class Summary: TranspositionCache([maximum number of entries], [side-effect-free commands])
+ Remembers the output of commands that don't change the game (look, inventory, exits, ...) per
+ game state, so asking again in a state already seen is answered from memory instead of by a
+ dfrotz round trip. Pass one to TextPlayer (or TextManager) as transposition_cache.
+
+ A state is fingerprinted by the digest of the snapshot it was restored from, or by the game
+ file when it was started, followed by every state-changing command sent since. Cached commands
+ are not sent to the game, so they don't advance its clock either: in games where looking takes
+ a turn, the state stays the one the cached answer was recorded in.
+
+ The same history only leads to the same state when dfrotz's random numbers are the same, so
+ every key also carries the player's lineage (state_lineage): players started with the same
+ seed share answers, e.g. the players of a GamePool or the children of a branch(), while a
+ player without a seed gets a lineage of its own and only ever reuses its own answers. The
+ interpreter's random numbers are not part of a snapshot, so the player that took a snapshot
+ keeps its own fingerprint rather than sharing the one its restored copies get.
+
+ Methods:    get([state key], [command]), returns the cached TurnResult or None
+             put([state key], [command], [TurnResult])
+             is_cacheable([command])
+             hits, misses
+'''
+
+DEFAULT_MAX_ENTRIES = 10000
+# Not 'score': it takes a turn in some games
+SIDE_EFFECT_FREE_COMMANDS = frozenset(['look', 'l', 'inventory', 'i', 'inv', 'exits'])
+
+def normalize_command(command):
+    return ' '.join(command.lower().split())
+
+# Players of the same lineage may share cached answers; unseeded players never do
+def state_lineage(seed=None):
+    if seed == None:
+        return 'unseeded ' + uuid.uuid4().hex
+    return 'seed %d' % seed
+
+def initial_state_key(game_filename, lineage=''):
+    return hashlib.sha1((lineage + '\n' + game_filename).encode('utf-8')).hexdigest()
+
+def restored_state_key(snapshot_digest, lineage=''):
+    return hashlib.sha1((lineage + '\nrestored ' + snapshot_digest).encode('utf-8')).hexdigest()
+
+def advance_state_key(state_key, command):
+    return hashlib.sha1((state_key + '\n' + normalize_command(command)).encode('utf-8')).hexdigest()
+
+class TranspositionCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, side_effect_free=SIDE_EFFECT_FREE_COMMANDS):
+        self.max_entries = max_entries
+        self.side_effect_free = frozenset(side_effect_free)
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_cacheable(self, command):
+        return normalize_command(command) in self.side_effect_free
+
+    def get(self, state_key, command):
+        key = (state_key, normalize_command(command))
+        with self.lock:
+            turn = self.entries.get(key)
+            if turn == None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return turn
+
+    def put(self, state_key, command, turn):
+        with self.lock:
+            self.entries[(state_key, normalize_command(command))] = turn
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,157 @@
+from collections import deque
+
+'''
+ Class Summary: WorldMap()
+ Graph of the rooms visited in a game: rooms are nodes, moves are edges labelled with their
+ direction. Exits are indexed per room ({room: {direction: room}}), so following a direction is
+ a dictionary lookup, and every move updates the graph in place instead of rescanning history.
+
+ A WorldMap also acts as the old movement_history list: iterating, len() and indexing (slices
+ too) see the moves in order as {'from': ..., 'direction': ..., 'to': ...} dicts.
+
+ Rooms are told apart by name only, so rooms sharing a title (mazes) are merged into one node.
+
+ Methods:    record_move([from room], [direction], [to room]), returns the move dict
+             record_blocked([room], [direction]), the direction was tried and led nowhere
+             add_exits([room], [directions]), exits the game mentioned for a room
+             describe([room], [exits], [objects]), exits and objects from the room's latest description
+             objects_in([room]), objects seen there in its latest description
+             destination([room], [direction]), returns the room that direction leads to or None
+             shortest_path([from room], [to room]), returns the list of directions or None
+             find_room([name]), returns the known room a typed name refers to, or None
+             unexplored_exits([room]), mentioned exits not taken or tried yet
+             recent_path([count]), the last count moves as one line of text
+'''
+
+DIRECTION_ALIASES = {
+    'n': 'north', 's': 'south', 'e': 'east', 'w': 'west',
+    'ne': 'northeast', 'nw': 'northwest', 'se': 'southeast', 'sw': 'southwest',
+    'u': 'up', 'd': 'down',
+}
+DIRECTIONS = frozenset(DIRECTION_ALIASES.values()) | frozenset(['in', 'out'])
+
+# Canonical direction for a movement command ('n', 'go north', 'North' -> 'north'), else None
+def normalize_direction(command):
+    words = command.lower().split()
+    if len(words) == 2 and words[0] in ('go', 'walk', 'run'):
+        words = words[1:]
+    if len(words) != 1:
+        return None
+    direction = DIRECTION_ALIASES.get(words[0], words[0])
+    return direction if direction in DIRECTIONS else None
+
+def format_move(move):
+    return f"[{move['from']} -> {move['direction']} -> {move['to']}]"
+
+class WorldMap:
+    def __init__(self):
+        self.exits = {}
+        self.mentioned = {}
+        self.blocked = {}
+        self.objects = {}
+        self.moves = []
+        self.move_texts = []
+        self.current_room = None
+        # Shortest-path trees by start room, dropped whenever an edge changes
+        self.path_trees = {}
+
+    def add_room(self, room):
+        if room not in self.exits:
+            self.exits[room] = {}
+
+    def record_move(self, from_room, direction, to_room):
+        direction = normalize_direction(direction) or direction.lower().strip()
+        self.add_room(from_room)
+        self.add_room(to_room)
+        if self.exits[from_room].get(direction) != to_room:
+            self.exits[from_room][direction] = to_room
+            self.path_trees.clear()
+        self.blocked.get(from_room, set()).discard(direction)
+        move = {'from': from_room, 'direction': direction, 'to': to_room}
+        self.moves.append(move)
+        self.move_texts.append(format_move(move))
+        self.current_room = to_room
+        return move
+
+    def record_blocked(self, room, direction):
+        direction = normalize_direction(direction) or direction.lower().strip()
+        self.add_room(room)
+        if direction not in self.exits[room]:
+            self.blocked.setdefault(room, set()).add(direction)
+
+    def add_exits(self, room, directions):
+        self.add_room(room)
+        self.mentioned.setdefault(room, set()).update(directions)
+
+    def describe(self, room, exits, objects):
+        self.add_exits(room, exits)
+        self.objects[room] = list(objects)
+
+    def objects_in(self, room=None):
+        if room == None:
+            room = self.current_room
+        return self.objects.get(room, [])
+
+    def destination(self, room, direction):
+        return self.exits.get(room, {}).get(normalize_direction(direction) or direction)
+
+    def shortest_path(self, from_room, to_room):
+        if from_room not in self.exits or to_room not in self.exits:
+            return None
+        tree = self.path_trees.get(from_room)
+        if tree == None:
+            tree = self.build_path_tree(from_room)
+            self.path_trees[from_room] = tree
+        if to_room not in tree:
+            return None
+        directions = []
+        room = to_room
+        while room != from_room:
+            room, direction = tree[room]
+            directions.append(direction)
+        directions.reverse()
+        return directions
+
+    # Breadth-first search from one room: {room: (previous room, direction taken from it)}
+    def build_path_tree(self, from_room):
+        tree = {from_room: None}
+        queue = deque([from_room])
+        while queue:
+            room = queue.popleft()
+            for direction, next_room in self.exits[room].items():
+                if next_room not in tree:
+                    tree[next_room] = (room, direction)
+                    queue.append(next_room)
+        return tree
+
+    # Exact name in any case, else the only known room whose name contains it
+    def find_room(self, name):
+        name = ' '.join(name.lower().split()).strip(' .')
+        if name.startswith('the '):
+            name = name[4:]
+        rooms = {room.lower(): room for room in self.exits}
+        if name in rooms:
+            return rooms[name]
+        matches = [room for lowered, room in rooms.items() if name and name in lowered]
+        return matches[0] if len(matches) == 1 else None
+
+    def unexplored_exits(self, room=None):
+        if room == None:
+            room = self.current_room
+        tried = set(self.exits.get(room, {})) | self.blocked.get(room, set())
+        return sorted(self.mentioned.get(room, set()) - tried)
+
+    def recent_path(self, count=5):
+        return ' → '.join(self.move_texts[-count:])
+
+    def rooms(self):
+        return list(self.exits)
+
+    def __iter__(self):
+        return iter(self.moves)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __getitem__(self, index):
+        return self.moves[index]
@@ -0,0 +1,199 @@
+import os
+import struct
+
+'''
+ Reading Z-machine story files (games/*.z5 and the like) directly, without dfrotz.
+
+ Class Summary: StoryFile([path of the story file])
+ Parses the header of a story file and decodes its dictionary (the words the game's parser
+ knows), abbreviations and object table.
+ Attributes: version, release, serial, dictionary_address, object_table_address,
+             abbreviations_address, alphabets
+ Methods:    dictionary(), returns (word separators, list of (word, data bytes)) in file order
+             words(), returns the dictionary words as a frozenset
+             abbreviations(), returns the abbreviation strings, in table order
+             objects(), returns a list of (short name, parent, sibling, child), object 1 first
+             resolution, how many Z-characters of each word the parser looks at (6 in v1-3, 9 after)
+
+ decode_text([story bytes], [address], ...) decodes a packed Z-character string (see the
+ Z-Machine Standard, section 3); dictionary_form([word], [resolution]) cuts a typed word down to
+ what the dictionary stores of it.
+'''
+
+# Header fields: (offset, struct format)
+HEADER_FIELDS = {
+    'version': (0x00, '>B'),
+    'release': (0x02, '>H'),
+    'high_memory_address': (0x04, '>H'),
+    'initial_pc': (0x06, '>H'),
+    'dictionary_address': (0x08, '>H'),
+    'object_table_address': (0x0A, '>H'),
+    'globals_address': (0x0C, '>H'),
+    'static_memory_address': (0x0E, '>H'),
+    'abbreviations_address': (0x18, '>H'),
+    'file_length': (0x1A, '>H'),
+    'checksum': (0x1C, '>H'),
+    'alphabet_address': (0x34, '>H'),
+}
+HEADER_SIZE = 0x40
+
+DEFAULT_ALPHABETS = (
+    'abcdefghijklmnopqrstuvwxyz',
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+    # Z-characters 6 and 7 of the third alphabet are the ZSCII escape and newline
+    ' \n0123456789.,!?_#\'"/\\-:()',
+)
+V1_ALPHABET_2 = ' 0123456789.,!?_#\'"/\\<-:()'
+
+def read_word(data, address):
+    return (data[address] << 8) | data[address + 1]
+
+def zscii_to_text(code):
+    if code == 13:
+        return '\n'
+    if 32 <= code < 127:
+        return chr(code)
+    return '?'
+
+# Decodes Z-characters starting at address; returns (text, address after the string)
+def decode_text(data, address, version, alphabets=DEFAULT_ALPHABETS, abbreviations_address=0, max_words=None, in_abbreviation=False):
+    zchars = []
+    words = 0
+    while True:
+        word = read_word(data, address)
+        address += 2
+        words += 1
+        zchars += [(word >> 10) & 0x1F, (word >> 5) & 0x1F, word & 0x1F]
+        if word & 0x8000 or (max_words != None and words >= max_words):
+            break
+
+    text = []
+    alphabet = 0
+    locked = 0
+    i = 0
+    while i < len(zchars):
+        zchar = zchars[i]
+        i += 1
+        if zchar == 0:
+            text.append(' ')
+        elif zchar in (1, 2, 3) and (version >= 3 or (version == 2 and zchar == 1)):
+            # Abbreviation: the next Z-character picks one of 96 strings
+            if i < len(zchars) and abbreviations_address and not in_abbreviation:
+                entry = abbreviations_address + 2 * (32 * (zchar - 1) + zchars[i])
+                text.append(decode_text(data, read_word(data, entry) * 2, version, alphabets, abbreviations_address, in_abbreviation=True)[0])
+            i += 1
+        elif zchar == 1:
+            text.append('\n')
+        elif zchar in (2, 3, 4, 5):
+            # Shifts: 4 and 5 for the next character (v3+); 2/3 shift and 4/5 lock in v1-2
+            if version >= 3:
+                alphabet = zchar - 3
+            elif zchar in (2, 3):
+                alphabet = (locked + zchar - 1) % 3
+            else:
+                locked = alphabet = (locked + zchar - 3) % 3
+            continue
+        elif alphabet == 2 and zchar == 6:
+            # ZSCII escape: the next two Z-characters make a 10-bit code
+            if i + 1 < len(zchars):
+                text.append(zscii_to_text((zchars[i] << 5) | zchars[i + 1]))
+            i += 2
+        else:
+            text.append(alphabets[alphabet][zchar - 6])
+        alphabet = locked
+    return ''.join(text), address
+
+class StoryFile:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        if len(self.data) < HEADER_SIZE:
+            raise ValueError('Not a Z-machine story file: ' + path)
+        self.path = path
+        for name, (offset, format) in HEADER_FIELDS.items():
+            setattr(self, name, struct.unpack_from(format, self.data, offset)[0])
+        if not 1 <= self.version <= 8:
+            raise ValueError('Not a Z-machine story file: ' + path)
+        self.serial = self.data[0x12:0x18].decode('ascii', errors='replace')
+        self.resolution = 6 if self.version <= 3 else 9
+        self.alphabets = self.read_alphabets()
+
+    def read_alphabets(self):
+        if self.version >= 5 and self.alphabet_address:
+            table = self.data[self.alphabet_address:self.alphabet_address + 78]
+            alphabets = [''.join(zscii_to_text(code) for code in table[row * 26:row * 26 + 26]) for row in range(3)]
+            alphabets[2] = ' \n' + alphabets[2][2:]
+            return tuple(alphabets)
+        if self.version == 1:
+            return DEFAULT_ALPHABETS[:2] + (V1_ALPHABET_2,)
+        return DEFAULT_ALPHABETS
+
+    def dictionary(self):
+        address = self.dictionary_address
+        separator_count = self.data[address]
+        separators = ''.join(zscii_to_text(code) for code in self.data[address + 1:address + 1 + separator_count])
+        address += 1 + separator_count
+        entry_length = self.data[address]
+        entry_count = abs(struct.unpack_from('>h', self.data, address + 1)[0])
+        address += 3
+        text_words = 2 if self.version <= 3 else 3
+        entries = []
+        for _ in range(entry_count):
+            word = decode_text(self.data, address, self.version, self.alphabets, max_words=text_words)[0]
+            entries.append((word.rstrip(' '), bytes(self.data[address + 2 * text_words:address + entry_length])))
+            address += entry_length
+        return separators, entries
+
+    def words(self):
+        return frozenset(word for word, _ in self.dictionary()[1])
+
+    def abbreviations(self):
+        if self.version < 2 or not self.abbreviations_address:
+            return []
+        count = 32 if self.version == 2 else 96
+        return [decode_text(self.data, read_word(self.data, self.abbreviations_address + 2 * i) * 2, self.version,
+                            self.alphabets, in_abbreviation=True)[0] for i in range(count)]
+
+    def objects(self):
+        # Property defaults come first, then one entry per object
+        if self.version <= 3:
+            address = self.object_table_address + 31 * 2
+            entry_size, tree_format, tree_offset = 9, '>BBB', 4
+        else:
+            address = self.object_table_address + 63 * 2
+            entry_size, tree_format, tree_offset = 14, '>HHH', 6
+        # The table has no count; the first property table marks where it ends
+        end = len(self.data)
+        objects = []
+        while address + entry_size <= end:
+            parent, sibling, child = struct.unpack_from(tree_format, self.data, address + tree_offset)
+            properties = read_word(self.data, address + entry_size - 2)
+            if properties < address or properties >= len(self.data):
+                break
+            end = min(end, properties)
+            name = ''
+            if self.data[properties]:
+                name = decode_text(self.data, properties + 1, self.version, self.alphabets, self.abbreviations_address,
+                                   max_words=self.data[properties])[0]
+            objects.append((name, parent, sibling, child))
+            address += entry_size
+        return objects
+
+# The start of a typed word the dictionary keeps: the letters whose Z-characters fit in resolution.
+# Letters outside the first alphabet cost a shift as well ('-' and digits take 2), and any other
+# character a 4 Z-character ZSCII escape, so 'air-pump' is stored as 'air-p' in a 6 letter game
+def dictionary_form(word, resolution, alphabets=DEFAULT_ALPHABETS):
+    used = 0
+    for i, char in enumerate(word):
+        if char in alphabets[0]:
+            used += 1
+        elif (char in alphabets[1] or char in alphabets[2]) and char not in ' \n':
+            used += 2
+        else:
+            used += 4
+        if used > resolution:
+            return word[:i]
+    return word
+
+def story_path(game_filename):
+    return os.path.join('games', game_filename)
@@ -2,9 +2,18 @@ import requests
 import time
 import os
 from textPlayer import TextPlayer
+from llm_client import get_client, DEFAULT_MODEL
+from action_stream import StreamedReply
+from history_window import HistoryWindow
+from llm_cache import ResponseCache
+from transposition_cache import TranspositionCache
+from world_map import WorldMap
+from room_parser import get_parser, is_movement_command
+from action_validator import ActionValidator
 from colorama import init, Fore, Style
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 # Initialize colorama
 init()
@@ -12,30 +21,22 @@ init()
 # Save file location
 SAVE_FILE = "zorkgame.sav"
 
-def is_movement_command(command):
-    """
-    Check if the command is a movement direction.
-    """
-    directions = ["n", "north", "s", "south", "e", "east", "w", "west", "up", "down", "ne", "northwest", "se", "southeast", "sw", "southwest", "nw", "northeast"]
-    return command.lower().strip() in directions
+# Stream the actor's replies and send the action to the game before the thinking has finished
+STREAM_RESPONSES = False
 
-def extract_room_name(output):
-    """
-    Extract the room name from the game output.
-    """
-    # Look for text before the first newline or the whole string if no newline
-    first_line = output.split("\n")[0].strip()
+# Set to a file name (e.g. "llm_cache.sqlite") to answer repeated requests from an on-disk cache,
+# so replays of the same game skip the model. Streamed replies are never cached.
+RESPONSE_CACHE_FILE = None
 
-    # Check if it's likely a room name (starts with capital letter and not an error message)
-    if first_line and first_line[0].isupper() and "I don't understand" not in first_line and "I can't" not in first_line:
-        return first_line
+# Answer look/inventory/exits repeated in an unchanged game state from memory
+CACHE_OBSERVATIONS = True
 
-    # If no room name found, check for common room name patterns
-    room_pattern = re.search(r"(You are in|You're in|This is) (the )?(.*?)(\.|$)", output)
-    if room_pattern:
-        return room_pattern.group(3).strip()
+# Check actions against the game's dictionary before sending them, and suggest ones it knows
+VALIDATE_ACTIONS = True
+SUGGESTED_ACTIONS = 8
 
-    return None
+# "goto <room>" walks to a visited room along the world map without asking the model each step
+GOTO_PATTERN = re.compile(r'^go ?to (?:the )?(.+)$')
 
 def save_game(text_player):
     """
@@ -91,13 +92,11 @@ def load_game(text_player):
         print(f"{Fore.RED}Failed to load game: {restore_output}{Style.RESET_ALL}", flush=True)
         return None
 
-def evaluate_progress(game_history, current_output, movement_history):
+def evaluate_progress(game_history, current_output, recent_path):
     """
     Evaluate the current game progress and create/update goals and plans.
     Returns a goal, plan, and reasoning for next actions.
     """
-    url = "http://localhost:11434/api/chat"
-
     system_prompt = """
 You are playing Zork I. Your job is to analyze the current game state
 and develop a clear goal and plan based on what has been discovered so far.
@@ -117,15 +116,8 @@ Be concise and clear. Avoid speculation and focus on concrete facts from the gam
     for entry in game_history[-20:]:  # Use the last 20 entries to avoid overwhelming the evaluator
         condensed_history.append(entry)
 
-    # Format movement history into a readable path
-    movement_path = "Movement path: "
-    if movement_history:
-        for i, move in enumerate(movement_history[-20:]):  # Only show the last 20 movements
-            movement_path += f"[{move['from']} -> {move['direction']} -> {move['to']}]"
-            if i < len(movement_history[-20:]) - 1:
-                movement_path += " → "
-    else:
-        movement_path += "No movements recorded yet."
+    # recent_path is the WorldMap's last 20 moves, already joined into a readable path
+    movement_path = "Movement path: " + (recent_path or "No movements recorded yet.")
 
     # Add the current output with movement history
     user_prompt = f"""
@@ -145,7 +137,7 @@ Be concise and clear. Avoid speculation and focus on concrete facts from the gam
     })
 
     data = {
-        "model": "llama3.2",
+        "model": DEFAULT_MODEL,
         "messages": [
             {"role": "system", "content": system_prompt},
             *condensed_history
@@ -184,10 +176,7 @@ Be concise and clear. Avoid speculation and focus on concrete facts from the gam
     }
 
     try:
-        response = requests.post(url, json=data)
-        response.raise_for_status()
-
-        content = response.json()["message"]["content"].strip()
+        content = get_client().chat(data)["message"]["content"].strip()
         try:
             result = json.loads(content)
             goal = result.get("goal", "Explore the current area")
@@ -196,38 +185,51 @@ Be concise and clear. Avoid speculation and focus on concrete facts from the gam
             critique = result.get("critique", "No critique provided")
             return goal, plan, reasoning, critique
         except json.JSONDecodeError:
-            return "Explore the current area", "Look around, examine objects, and try to find useful items", "Need to gather more information about the environment"
+            return "Explore the current area", "Look around, examine objects, and try to find useful items", "Need to gather more information about the environment", "No critique provided"
 
     except requests.exceptions.RequestException:
-        return "Explore the current area", "Look around, examine objects, and try to find useful items", "Need to gather more information about the environment"
-
-def chat_with_ollama(game_output, game_history, goal, plan, reasoning, critique, movement_history):
-    """
-    Send game output to Ollama and get the next action.
-    """
-    url = "http://localhost:11434/api/chat"
-
-    # Format movement history into a readable path for the last 5 movements
-    movement_path = ""
-    if movement_history:
-        movement_path = "Recent movement path: "
-        for i, move in enumerate(movement_history[-5:]):  # Only show the last 5 movements
-            movement_path += f"[{move['from']} -> {move['direction']} -> {move['to']}]"
-            if i < len(movement_history[-5:]) - 1:
-                movement_path += " → "
-
-    # Create a context-aware prompt
-    system_prompt = f"""
+        return "Explore the current area", "Look around, examine objects, and try to find useful items", "Need to gather more information about the environment", "No critique provided"
+
+# Response schema for the actor. The streaming variant asks for the action first, so it can be
+# sent to the game while the model is still writing out its reasoning.
+ACTION_FORMAT = {
+    "type": "object",
+    "properties": {
+        "thinking": {
+            "description": "A string explaining your reasoning",
+            "type": "string"
+        },
+        "action": {
+            "description": "A string with the command to execute",
+            "type": "string"
+        }
+    },
+    "required": [
+        "thinking",
+        "action"
+    ]
+}
+STREAM_ACTION_FORMAT = {
+    "type": "object",
+    "properties": {
+        "action": ACTION_FORMAT["properties"]["action"],
+        "thinking": ACTION_FORMAT["properties"]["thinking"]
+    },
+    "required": [
+        "action",
+        "thinking"
+    ]
+}
+
+# The actor's instructions never change, so every request starts with the same tokens and the
+# server can reuse its cached prompt evaluation. Anything that changes goes at the tail.
+ACTOR_SYSTEM_PROMPT = """
 You are a player playing Zork I.
 You are trying to solve the puzzles and navigate the world.
 There is a lot to discover, try to find everything you can.
 
-GOAL: {goal}
-PLAN: {plan}
-REASONING: {reasoning}
-CRITIQUE: {critique}
-
-{movement_path}
+Your current GOAL, PLAN, REASONING and CRITIQUE, and your recent movement path, are given
+after the latest game output.
 
 DON'T GIVE UP! ZORK IS A HARD GAME BUT IT IS SOLVABLE!
 
@@ -236,6 +238,7 @@ Reminders:
 - If something doesn't work or you get lost, try the LOOK and EXITS commands to get your bearings.
 - If you get stuck trying exploring in different directions.
 - Direction ACTIONs: EXITS, N, E, S, W, UP, DOWN, NE, SE, SW, NW
+- To walk back to a room you have already visited, use the ACTION: GOTO <room name>
 - Common ACTIONs: LOOK, EXAMINE, INVENTORY, TAKE, DROP, OPEN, USE
 - Other ACTIONs: READ, HIT, PUT _ IN _, SHOW _ TO _, GIVE _ TO _, DROP _, WAIT
 
@@ -245,43 +248,97 @@ DO NOT QUIT!
 # You must respond with a JSON object. Example:
 # { "thinking": "I see a sword on the ground. Taking it would be useful for combat later.", "action": "take sword" }
 
+def build_action_request(game_output, game_history, goal, plan, reasoning, critique, movement_history, response_format=ACTION_FORMAT, suggestions=None):
+    """
+    Build the Ollama chat request that asks for the next action.
+    Layout: static system prompt, then game history, then one final message with the latest
+    output followed by the current goal, plan, movement path, and the unexplored exits and
+    objects of the current room.
+    """
+    # movement_history is the WorldMap, which keeps each move's text ready to join
+    movement_path = ""
+    if movement_history:
+        movement_path = "Recent movement path: " + movement_history.recent_path(5)
+    unexplored = movement_history.unexplored_exits()
+    if unexplored:
+        movement_path += "\nUnexplored exits here: " + ", ".join(unexplored)
+    objects = movement_history.objects_in()
+    if objects:
+        movement_path += "\nObjects seen here: " + ", ".join(objects)
+    if suggestions:
+        movement_path += "\nActions the game understands here: " + ", ".join(suggestions)
+
+    current_state = f"""{game_output}
+
+GOAL: {goal}
+PLAN: {plan}
+REASONING: {reasoning}
+CRITIQUE: {critique}
+
+{movement_path}
+"""
+
     # Create messages array with system prompt and game history
-    messages = [{"role": "system", "content": system_prompt}]
+    messages = [{"role": "system", "content": ACTOR_SYSTEM_PROMPT}]
     messages.extend(game_history)
-    messages.append({"role": "user", "content": game_output})
+    messages.append({"role": "user", "content": current_state})
 
-    data = {
-        "model": "llama3.2",
+    return {
+        "model": DEFAULT_MODEL,
         "messages": messages,
         "stream": False,
-        "format": {
-            "type": "object",
-            "properties": {
-                "thinking": {
-                    "description": "A string explaining your reasoning",
-                    "type": "string"
-                },
-                "action": {
-                    "description": "A string with the command to execute",
-                    "type": "string"
-                }
-            },
-            "required": [
-                "thinking",
-                "action"
-            ]
-        },
+        "format": response_format,
         "options": {
             "temperature": 0.7
         }
     }
 
-    try:
-        response = requests.post(url, json=data)
-        response.raise_for_status()
+class BackgroundEvaluator:
+    """
+    Runs evaluate_progress on a worker thread, so the actor keeps playing with the previous
+    goal and plan while the evaluator works, and picks up the new ones when they land.
+    """
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
+
+    def busy(self):
+        return self.future is not None and not self.future.done()
+
+    def submit(self, game_history, game_output, movement_history):
+        """
+        Start an evaluation on copies of the current state. Returns False if one is already running.
+        """
+        if self.busy():
+            return False
+        self.future = self.executor.submit(evaluate_progress, list(game_history), game_output, movement_history.recent_path(20))
+        return True
 
+    def poll(self):
+        """
+        Return (goal, plan, reasoning, critique) once a finished evaluation is waiting, else None.
+        """
+        if self.future is None or not self.future.done():
+            return None
+        future, self.future = self.future, None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"\n{Fore.RED}Error evaluating progress: {e}{Style.RESET_ALL}", flush=True)
+            return None
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+def chat_with_ollama(game_output, game_history, goal, plan, reasoning, critique, movement_history, suggestions=None):
+    """
+    Send game output to Ollama and get the next action.
+    """
+    data = build_action_request(game_output, game_history, goal, plan, reasoning, critique, movement_history, suggestions=suggestions)
+
+    try:
         # Get the content from the response
-        content = response.json()["message"]["content"].strip()
+        content = get_client().chat(data)["message"]["content"].strip()
 
         # Parse the JSON response
         try:
@@ -303,6 +360,28 @@ DO NOT QUIT!
         print(f"\n{Fore.RED}Error communicating with Ollama: {e}{Style.RESET_ALL}")
         return None, None
 
+def stream_chat_with_ollama(game_output, game_history, goal, plan, reasoning, critique, movement_history, on_thinking=None, suggestions=None):
+    """
+    Streaming version of chat_with_ollama. Returns a StreamedReply as soon as the request is
+    accepted: reply.wait_for("action") returns once the action is complete, while the thinking
+    keeps arriving through on_thinking(chunk) and is in reply.result() when the stream ends.
+    Returns None if Ollama could not be reached.
+    """
+    data = build_action_request(game_output, game_history, goal, plan, reasoning, critique, movement_history, STREAM_ACTION_FORMAT, suggestions)
+
+    def on_text(field, chunk):
+        if field == "thinking" and on_thinking:
+            on_thinking(chunk)
+
+    try:
+        return StreamedReply(get_client().chat_stream(data), on_text)
+    except requests.exceptions.RequestException as e:
+        print(f"\n{Fore.RED}Error communicating with Ollama: {e}{Style.RESET_ALL}")
+        return None
+
+def print_thinking(chunk):
+    print(f"{Fore.BLUE}{chunk}{Style.RESET_ALL}", end='', flush=True)
+
 def clean_action(action):
     """
     The AI loves to say certain patterns of words that are not valid commands.
@@ -320,33 +399,86 @@ def clean_action(action):
     else:
         return action.strip()
 
-def run_game_loop(text_player):
+def load_validator(game_filename):
+    """
+    ActionValidator for the game, or None if its story file can't be read.
+    """
+    try:
+        return ActionValidator(game_filename)
+    except (OSError, ValueError, IndexError) as e:
+        print(f"{Fore.YELLOW}Not validating actions: {e}{Style.RESET_ALL}", flush=True)
+        return None
+
+def run_goto(text_player, world_map, current_room, destination):
+    """
+    Walk to a room already on the world map: the directions of the shortest known route go to
+    the game in one burst, with no model call per step. The map follows the burst until the game
+    disagrees with it (the rest of the burst has been sent by then).
+    Returns the text for the model, the room reached and the game's output for the last step
+    ("" if nothing was sent), which is what the room parser should see.
+    """
+    target = world_map.find_room(destination)
+    if target is None:
+        return f"GOTO: no visited room called '{destination}'. Visited rooms: {', '.join(world_map.rooms())}", current_room, ""
+    route = world_map.shortest_path(current_room, target)
+    if route is None:
+        return f"GOTO: no known route from {current_room} to {target}.", current_room, ""
+    if not route:
+        return f"GOTO: you are already in {target}.", current_room, ""
+
+    room_parser = get_parser(text_player.game_filename)
+    turns = text_player.execute_turns(route)
+    steps_taken = 0
+    for direction, turn in zip(route, turns):
+        expected_room = world_map.destination(current_room, direction)
+        if room_parser.room_name(turn.text) != expected_room:
+            break
+        world_map.record_move(current_room, direction, expected_room)
+        current_room = expected_room
+        steps_taken += 1
+
+    last_output = turns[-1].text if turns else ""
+    if steps_taken < len(route):
+        current_room = room_parser.room_name(last_output) or current_room
+        # The moves after the block are unknown, but the map must still describe where we are
+        world_map.current_room = current_room
+        return f"GOTO {target}: the route was blocked after {', '.join(route[:steps_taken]) or 'no steps'}.\n{last_output}", current_room, last_output
+    return f"GOTO {target}: walked {', '.join(route)}.\n{last_output}", current_room, last_output
+
+def run_game_loop(text_player, max_steps=None, action_interval=0.5):
     """
     Run the main game loop, handling AI interactions and game state.
+    Stops after max_steps actions if given (for benchmarks against llm_client.StubBackend).
     Returns True if the game should continue, False if it should end.
     """
-    MAX_HISTORY = 30  # Number of turns to keep in history
+    HISTORY_TOKEN_BUDGET = 6000  # Approximate tokens of history to send; older turns are summarized
     AUTOSAVE_INTERVAL = 10000000 # disabled  # Auto-save every 20 steps
 
     last_action_time = 0
     failure_count = 0
     steps = 0
-    game_history = []
+    game_history = HistoryWindow(HISTORY_TOKEN_BUDGET)
     evaluation_counter = 0
+    evaluator = BackgroundEvaluator()
     current_goal = "Explore the starting area"
     current_plan = "Look around, examine objects, and try to gather useful items"
     current_reasoning = "Need to gather information about the starting location"
     current_critique = "Approach is fine so far."
-    # Room tracking
-    movement_history = []
+    # Room tracking: a WorldMap, which still reads like the list of {'from', 'direction', 'to'} moves
+    movement_history = WorldMap()
     current_room = "Unknown"
+    # Room titles, objects and exits are read off every turn's output
+    room_parser = get_parser(text_player.game_filename)
+    validator = load_validator(text_player.game_filename) if VALIDATE_ACTIONS else None
 
     # Get initial game output
     game_output = text_player.run()
-    room_name = extract_room_name(game_output)
-    if room_name:
-        current_room = room_name
+    room_state = room_parser.parse(game_output)
+    if room_state.room:
+        current_room = room_state.room
         print(f"{Fore.YELLOW}Starting in: {current_room}{Style.RESET_ALL}")
+    movement_history.current_room = current_room
+    movement_history.describe(current_room, room_state.exits, room_state.objects)
 
     game_history.append({"role": "user", "content": game_output})
     print(f"{Fore.GREEN}{game_output}{Style.RESET_ALL}")
@@ -356,26 +488,33 @@ def run_game_loop(text_player):
     if load_output:
         # Get the updated room after loading
         game_output = text_player.execute_command("look")
-        room_name = extract_room_name(game_output)
-        if room_name:
-            current_room = room_name
+        room_state = room_parser.parse(game_output)
+        if room_state.room:
+            current_room = room_state.room
             print(f"{Fore.YELLOW}Current location: {current_room}{Style.RESET_ALL}")
+        movement_history.current_room = current_room
+        movement_history.describe(current_room, room_state.exits, room_state.objects)
         game_history.append({"role": "user", "content": game_output})
         print(f"{Fore.GREEN}{game_output}{Style.RESET_ALL}")
 
-    while True:
+    while max_steps == None or steps < max_steps:
         current_time = time.time()
 
-        # Wait at least 0.5 seconds between actions
-        if current_time - last_action_time >= 0.5:
+        # Wait at least action_interval seconds between actions
+        if current_time - last_action_time >= action_interval:
             # Auto-save every AUTOSAVE_INTERVAL steps
             if steps > 0 and steps % AUTOSAVE_INTERVAL == 0:
                 save_game(text_player)
 
-            # Evaluate progress every 5 steps
-            if evaluation_counter >= 10:
-                print(f"\n{Fore.YELLOW}   Evaluating progress... {Style.RESET_ALL}", flush=True)
-                current_goal, current_plan, current_reasoning, current_critique = evaluate_progress(game_history, game_output, movement_history)
+            # Evaluate progress every 10 steps, in the background
+            if evaluation_counter >= 10 and evaluator.submit(game_history, game_output, movement_history):
+                print(f"\n{Fore.YELLOW}   Evaluating progress in the background... {Style.RESET_ALL}", flush=True)
+                evaluation_counter = 0
+
+            # Swap in the new goal and plan once the evaluator has finished
+            evaluation = evaluator.poll()
+            if evaluation:
+                current_goal, current_plan, current_reasoning, current_critique = evaluation
                 print(f"{Fore.CYAN}GOAL: {current_goal}{Style.RESET_ALL}", flush=True)
                 print(f"{Fore.CYAN}PLAN: {current_plan}{Style.RESET_ALL}", flush=True)
                 print(f"{Fore.CYAN}REASONING: {current_reasoning}{Style.RESET_ALL}\n", flush=True)
@@ -384,44 +523,71 @@ def run_game_loop(text_player):
                 # Print movement history
                 if movement_history:
                     print(f"{Fore.YELLOW}MOVEMENT PATH (last 5):{Style.RESET_ALL}", flush=True)
-                    for i, move in enumerate(movement_history[-5:]):
-                        print(f"{Fore.YELLOW}  {move['from']} → {move['direction']} → {move['to']}{Style.RESET_ALL}", flush=True)
+                    for move_text in movement_history.move_texts[-5:]:
+                        print(f"{Fore.YELLOW}  {move_text}{Style.RESET_ALL}", flush=True)
                     print()
 
-                evaluation_counter = 0
-
             # Show thinking indicator
             print(f"\n{Fore.YELLOW}   Thinking... {Style.RESET_ALL}", end='', flush=True)
 
             # Get AI's next action
-            thinking, action = chat_with_ollama(game_output, game_history, current_goal, current_plan, current_reasoning, current_critique, movement_history)
+            suggestions = None
+            if validator:
+                suggestions = validator.ranked_actions(movement_history.objects_in(), movement_history.unexplored_exits(), SUGGESTED_ACTIONS)
+            reply = None
+            if STREAM_RESPONSES:
+                reply = stream_chat_with_ollama(game_output, game_history, current_goal, current_plan, current_reasoning, current_critique, movement_history, print_thinking, suggestions)
+                action = reply.wait_for("action") if reply else None
+                thinking = None
+                if action != None:
+                    action = clean_action(action)
+            else:
+                thinking, action = chat_with_ollama(game_output, game_history, current_goal, current_plan, current_reasoning, current_critique, movement_history, suggestions)
 
             if thinking or action:
                 failure_count = 0
-                # Show AI's reasoning and action
-                print(f"{Fore.BLUE}{thinking}{Style.RESET_ALL}", flush=True)
+                # Show AI's reasoning and action (streamed replies print their thinking as it arrives)
+                if reply == None:
+                    print(f"{Fore.BLUE}{thinking}{Style.RESET_ALL}", flush=True)
                 print(f"{Fore.MAGENTA}{steps}> {action}{Style.RESET_ALL}", flush=True)
                 print("\n")
 
                 # Record the current room before executing command
                 previous_room = current_room
 
-                # Send the action to the game
-                game_output = text_player.execute_command(action)
-
-                # Check if this was a movement command and update room tracking
-                if is_movement_command(action):
-                    new_room_name = extract_room_name(game_output)
-                    if new_room_name and new_room_name != current_room:
-                        # Record the movement in our history
-                        movement = {
-                            "from": previous_room,
-                            "direction": action,
-                            "to": new_room_name
-                        }
-                        movement_history.append(movement)
-                        current_room = new_room_name
-                        print(f"{Fore.YELLOW}Moved to: {current_room}{Style.RESET_ALL}", flush=True)
+                # Send the action to the game (a goto becomes a burst of directions)
+                goto = GOTO_PATTERN.match(action)
+                checked_action = validator.normalize(action) if validator and not goto else action
+                if goto:
+                    game_output, current_room, goto_output = run_goto(text_player, movement_history, current_room, goto.group(1))
+                    print(f"{Fore.YELLOW}Now in: {current_room}{Style.RESET_ALL}", flush=True)
+                elif checked_action is None:
+                    # The game's parser would reject it, so don't spend a turn finding that out
+                    game_output = f"The game does not know the word(s): {', '.join(validator.unknown_words(action))}."
+                    if suggestions:
+                        game_output += f" Try one of: {', '.join(suggestions)}"
+                else:
+                    action = checked_action
+                    game_output = text_player.execute_command(action)
+                if reply != None:
+                    thinking = reply.result().get("thinking", "")
+
+                # Update room tracking: any command can move the player ("enter window", "climb
+                # tree"), so a new room title counts as a move labelled with the command
+                # After a goto, the game's own last output (game_output starts with the GOTO summary)
+                room_state = room_parser.parse(goto_output if goto else game_output)
+                new_room_name = room_state.room
+                if goto:
+                    pass
+                elif new_room_name and new_room_name != current_room:
+                    movement_history.record_move(previous_room, action, new_room_name)
+                    current_room = new_room_name
+                    print(f"{Fore.YELLOW}Moved to: {current_room}{Style.RESET_ALL}", flush=True)
+                elif is_movement_command(action):
+                    movement_history.record_blocked(current_room, action)
+                # Any turn that describes the current room (moving, LOOK, ...) refreshes its exits and objects
+                if room_state.room == current_room:
+                    movement_history.describe(current_room, room_state.exits, room_state.objects)
 
                 # Print game output
                 print(f"{Fore.GREEN}{game_output}{Style.RESET_ALL}", flush=True)
@@ -429,11 +595,8 @@ def run_game_loop(text_player):
                 # Add the new interaction to history
                 game_history.append({"role": "assistant", "content": f"Thinking: {thinking}\nAction: {action}"})
                 game_history.append({"role": "user", "content": game_output})
-
-                # Maintain fixed-size history (in pairs of turns)
-                while len(game_history) > MAX_HISTORY * 2:  # *2 because each turn has user and game messages
-                    game_history.pop(0)
-                    game_history.pop(0)
+                # HistoryWindow keeps itself within HISTORY_TOKEN_BUDGET, evicting a chunk of the
+                # oldest turns at a time into its running summary
 
                 steps += 1
                 evaluation_counter += 1
@@ -445,14 +608,17 @@ def run_game_loop(text_player):
                 time.sleep(failure_count)
                 if failure_count > 5:
                     print(f"{Fore.RED}Error: Failed to get action from Ollama{Style.RESET_ALL}")
+                    evaluator.shutdown()
                     return False
 
             # Check for quit command
             if action and action.lower().strip() == 'quit':
                 # Save game before quitting
                 save_game(text_player)
+                evaluator.shutdown()
                 return False
 
+    evaluator.shutdown()
     return True
 
 def run_zork():
@@ -463,7 +629,8 @@ def run_zork():
     # Initialize TextPlayer with zork1.z5
     text_player = None
     try:
-        text_player = TextPlayer('zork1.z5')
+        text_player = TextPlayer('zork1.z5', wait_for_prompt=True,
+                                 transposition_cache=TranspositionCache() if CACHE_OBSERVATIONS else None)
 
         if not text_player.game_loaded_properly:
             print(f"{Fore.RED}Error: Failed to load zork1.z5. Make sure it's in the games/ directory.{Style.RESET_ALL}")
@@ -473,6 +640,9 @@ def run_zork():
         if not check_ollama_connection():
             return
 
+        if RESPONSE_CACHE_FILE:
+            get_client().cache = ResponseCache(RESPONSE_CACHE_FILE)
+
         # Run the main game loop
         run_game_loop(text_player)
 
@@ -485,18 +655,16 @@ def run_zork():
 
 def check_ollama_connection():
     """
-    Check if Ollama is running and the llama3.2 model is installed.
+    Check if the LLM server is running and DEFAULT_MODEL is installed.
     Returns True if everything is ready, False otherwise.
     """
     try:
-        model_check = requests.get("http://localhost:11434/api/tags")
-        model_check.raise_for_status()
-        models = model_check.json().get("models", [])
-        if not any(model.get("name", "").startswith("llama3.2") for model in models):
-            print(f"\n{Fore.RED}Error: The llama3.2 model is not installed.{Style.RESET_ALL}")
+        models = get_client().tags().get("models", [])
+        if not any(model.get("name", "").startswith(DEFAULT_MODEL) for model in models):
+            print(f"\n{Fore.RED}Error: The {DEFAULT_MODEL} model is not installed.{Style.RESET_ALL}")
             print(f"{Fore.YELLOW}To fix this:{Style.RESET_ALL}")
             print("1. Make sure Ollama is running (ollama serve)")
-            print("2. In a separate terminal, run: ollama pull llama3.2")
+            print(f"2. In a separate terminal, run: ollama pull {DEFAULT_MODEL}")
             print("3. Then try running this script again\n")
             return False
         return True
@@ -505,7 +673,7 @@ def check_ollama_connection():
         print(f"{Fore.YELLOW}To fix this:{Style.RESET_ALL}")
         print("1. Install Ollama from https://ollama.com/download")
         print("2. Start Ollama by running: ollama serve")
-        print("3. In a separate terminal, run: ollama pull llama3.2")
+        print(f"3. In a separate terminal, run: ollama pull {DEFAULT_MODEL}")
         print("4. Then try running this script again\n")
         return False
 